@@ -0,0 +1,6 @@
+from audio.metrics import AudioMetrics, MetricsReporter
+from audio.mixer import Mixer, to_gains
+from audio.phrases import Phrases
+from audio.ring import RingBuffer
+from audio.writer import TakeWriter
+from audio.timeline import ClockTimeline, SampleClock
@@ -0,0 +1,136 @@
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from audio.ring import RingBuffer
+
+BUCKETS = 16  # log2 of the callback duration in µs, the last one is >= 16ms
+FLAGS = [
+    "input_underflow",
+    "input_overflow",
+    "output_underflow",
+    "output_overflow",
+    "priming_output",
+]
+
+
+class AudioMetrics:
+    """Counters of the audio callback, only written by the callback.
+
+    Each counter is a single attribute or list item store, so the callback
+    never waits on a lock. A snapshot may straddle two callbacks, which is
+    fine for monitoring.
+    """
+
+    def __init__(self, samplerate: float, ring: Optional[RingBuffer] = None):
+        self.samplerate = samplerate
+        self.ring = ring
+        self.callbacks = 0
+        self.histogram = [0] * BUCKETS
+        self.budget = 0.0  # last callback duration / block duration
+        self.peak = 0.0  # highest budget since the last snapshot
+        self.xruns = 0
+        self.flags = dict.fromkeys(FLAGS, 0)
+
+    def record(self, start: float, end: float, frames: int, status=None):
+        """Called at the end of each callback with its start and end times"""
+        duration = end - start
+        bucket = min(int(duration * 1e6).bit_length(), BUCKETS - 1)
+        self.histogram[bucket] += 1
+        self.budget = duration * self.samplerate / max(frames, 1)
+        if self.budget > self.peak:
+            self.peak = self.budget
+        self.callbacks += 1
+        if status:
+            self.xruns += 1
+            for flag in FLAGS:
+                if getattr(status, flag, False):
+                    self.flags[flag] += 1
+
+    def snapshot(self, reset=True):
+        """Current counters, the peak budget restarts if `reset`"""
+        peak = self.peak
+        if reset:
+            self.peak = 0.0
+        snapshot = dict(
+            callbacks=self.callbacks,
+            budget=self.budget,
+            peak=peak,
+            xruns=self.xruns,
+            flags=dict(self.flags),
+            # upper bound of each bucket, in µs
+            histogram={2**i: n for i, n in enumerate(self.histogram) if n > 0},
+        )
+        ring = self.ring
+        if ring is not None:
+            snapshot["ring"] = dict(
+                fill=ring.fill / ring.capacity,
+                peak=ring.peak / ring.capacity,
+                overruns=ring.overruns,
+                dropped=ring.dropped,
+            )
+        return snapshot
+
+
+class MetricsReporter(threading.Thread):
+    """Logs the audio metrics every `interval` seconds.
+
+    With a `port`, the counters are also served as JSON on localhost.
+    """
+
+    def __init__(self, metrics: AudioMetrics, interval=10.0, port=None):
+        super().__init__(name="[AUD] Metrics", daemon=True)
+        self.metrics = metrics
+        self.interval = interval
+        self.last = metrics.snapshot()
+        self.server: Optional[ThreadingHTTPServer] = None
+        self._done = threading.Event()
+        if port is not None:
+            self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+            serve = threading.Thread(target=self.server.serve_forever, daemon=True)
+            serve.start()
+            logging.info("[AUD] Metrics served on %s:%i", *self.server.server_address)
+
+    def stop(self):
+        self._done.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            self.report()
+
+    def report(self):
+        previous, self.last = self.last, self.metrics.snapshot()
+        last = self.last
+        infos = [
+            last["callbacks"] - previous["callbacks"],
+            last["budget"] * 100,
+            last["peak"] * 100,
+            last["xruns"] - previous["xruns"],
+        ]
+        message = "[AUD] %i callbacks, %i%% budget (%i%% peak), %i xruns"
+        if "ring" in last:
+            message += ", %i%% ring"
+            infos.append(last["ring"]["fill"] * 100)
+        log = logging.warning if infos[3] > 0 else logging.info
+        log(message, *infos)
+
+    def _handler(self):
+        reporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = json.dumps(reporter.metrics.snapshot(reset=False)).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *_):
+                pass
+
+        return Handler
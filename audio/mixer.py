@@ -0,0 +1,83 @@
+from numpy import (
+    add,
+    arange,
+    divide,
+    empty_like,
+    multiply,
+    ndarray,
+    ones,
+    subtract,
+    zeros,
+    float32,
+)
+
+STRINGS = 6  # channels 0~5 are the strings, 6~7 are the SY-1000 OUT-L/OUT-R
+
+
+def to_gains(volumes: ndarray, pans: ndarray, x: float, out=None):
+    """Folds the volumes, pans and crossfader into one gain per channel"""
+    if out is None:
+        out = empty_like(volumes)
+    out[:] = volumes
+    # each string is panned on the crossfader A/B sides, then crossfaded
+    out[:STRINGS] *= (1 - pans[:STRINGS]) * (1 - x) + pans[:STRINGS] * x
+    out[STRINGS] *= 1 - pans[STRINGS]  # OUT-L
+    out[STRINGS + 1] *= pans[STRINGS + 1]  # OUT-R
+    return out
+
+
+class Mixer:
+    """Adds the phrase playback to the live input, without allocating"""
+
+    def __init__(self, channels=8, frames=1024):
+        self.channels = channels
+        self.gains = ones(channels, dtype=float32)
+        self._current = self.gains
+        self._delta = zeros(channels, dtype=float32)
+        self._resize(frames)
+
+    def _resize(self, frames: int):
+        self._buffers = zeros((frames, self.channels), dtype=float32)
+        self._ramps = zeros((frames, self.channels), dtype=float32)
+        self._counts = arange(1, frames + 1, dtype=float32)[:, None]
+        self._all_steps = zeros((frames, 1), dtype=float32)
+        self._block(frames)
+
+    def _block(self, frames: int):
+        """Views of the buffers for this block size"""
+        self._buffer = self._buffers[:frames]
+        self._ramp = self._ramps[:frames]
+        self._steps = self._all_steps[:frames]
+        divide(self._counts[:frames], frames, out=self._steps)
+
+    def update(self, volumes: ndarray, pans: ndarray, x: float, smooth=True):
+        """Computes the new gains outside of the audio thread, then swaps them in"""
+        gains = to_gains(volumes, pans, x)
+        if not smooth:
+            self._current = gains
+        self.gains = gains
+
+    def buffer(self, frames: int):
+        """Zeroed scratch buffer receiving the playback of the current block"""
+        if frames > len(self._buffers):  # only when the host block size grows
+            self._resize(frames)
+        elif frames != len(self._buffer):
+            self._block(frames)
+        buffer = self._buffer
+        buffer.fill(0)
+        return buffer
+
+    def mix(self, indata: ndarray, outdata: ndarray):
+        """outdata = indata + playback * gains, over the whole block at once"""
+        channels = self.channels
+        buffer = self._buffer
+        gains = self.gains
+        if gains is self._current:
+            multiply(buffer, gains, out=buffer)
+        else:  # ramps from the previous gains over the block (no zipper noise)
+            subtract(gains, self._current, out=self._delta)
+            multiply(self._steps, self._delta, out=self._ramp)
+            self._ramp += self._current
+            multiply(buffer, self._ramp, out=buffer)
+            self._current = gains
+        add(indata[:, :channels], buffer, out=outdata[:, :channels])
@@ -0,0 +1,155 @@
+import os
+import json
+import struct
+import threading
+from itertools import count
+from typing import Iterable, Optional
+from numpy import memmap, ndarray, zeros, float32
+
+MAGIC = b"OCTOSET1"
+ALIGN = 4096  # samples start on a page boundary, so they can be mapped as is
+CHUNK = 48000  # phrase buffers grow by this many frames
+
+
+class Phrases:
+    """Phrase buffers, only allocated once a phrase gets recorded.
+
+    With a `directory`, buffers are `numpy.memmap` files the OS can page out.
+    A phrase is a view of the first `size` frames of a buffer grown by whole
+    chunks: resizing only swaps in new views, and a buffer only grows once its
+    phrase is armed for recording (a file grows without copying its audio, a
+    fresh in-memory buffer reserves one more chunk). The audio thread always
+    reads a consistent array.
+    """
+
+    def __init__(self, phrases=16, channels=8, size=0, directory=None, chunk=CHUNK):
+        self.channels = channels
+        self.size = size
+        self.directory = directory
+        self.chunk = chunk
+        self._data: list[Optional[ndarray]] = [None] * phrases
+        self._buffers: list[Optional[ndarray]] = [None] * phrases
+        self._files: list[Optional[str]] = [None] * phrases
+        self._ids = count()
+        self._saving = threading.Lock()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __getitem__(self, idx: int):
+        return self._data[idx]
+
+    @property
+    def allocated(self):
+        return [idx for idx, data in enumerate(self._data) if data is not None]
+
+    def arm(self, idx: int):
+        """Allocates the phrase buffer (if needed) before recording into it"""
+        buffer = self._buffers[idx]
+        if buffer is None or len(buffer) < self.size:
+            buffer = self._grow(idx, buffer)
+        data = self._data[idx]
+        if data is None or len(data) != self.size:
+            self._data[idx] = buffer[: self.size]
+        return self._data[idx]
+
+    def capacity(self, idx: int):
+        """Frames of a phrase buffer, recorded or not"""
+        buffer = self._buffers[idx]
+        return 0 if buffer is None else len(buffer)
+
+    def resize(self, size: int):
+        """Sets the phrases length in whole chunks, unless it shrinks by one chunk
+        at most, the recorded phrases are shortened to their buffer until armed"""
+        size = -(-size // self.chunk) * self.chunk
+        if self.size - self.chunk <= size <= self.size:
+            return
+        self.size = size
+        for idx in self.allocated:
+            self._data[idx] = self._buffers[idx][:size]  # type: ignore
+
+    def snapshot(self, copy: "Iterable[int]" = ()):
+        """Recorded phrases by index, the `copy` ones (being recorded) copied"""
+        copy = set(copy)
+        return {
+            idx: data.copy() if idx in copy else data
+            for idx, data in enumerate(self._data)
+            if data is not None
+        }
+
+    def save(self, path: str, snapshot: "Optional[dict[int, ndarray]]" = None, **state):
+        """Writes the recorded phrases and extra `state` to a single file"""
+        if snapshot is None:
+            snapshot = self.snapshot()
+        header = dict(state, channels=self.channels, size=self.size, phrases=[])
+        offset = 0
+        for idx, data in snapshot.items():
+            header["phrases"].append(dict(index=idx, offset=offset, frames=len(data)))
+            offset += _aligned(data.nbytes)
+        head = json.dumps(header).encode()
+        start = _aligned(len(MAGIC) + 4 + len(head))
+        tmp_path = path + ".tmp"
+        with self._saving:  # one save at a time
+            with open(tmp_path, "wb") as file:
+                file.write(MAGIC + struct.pack("<I", len(head)) + head)
+                for entry in header["phrases"]:
+                    file.seek(start + entry["offset"])
+                    snapshot[entry["index"]].tofile(file)
+                file.truncate(start + offset)
+            os.replace(tmp_path, path)
+
+    def load(self, path: str):
+        """Maps the phrases of a saved file (copy-on-write), returns its state"""
+        with open(path, "rb") as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError("%s is not a phrases file" % path)
+            length = struct.unpack("<I", file.read(4))[0]
+            header = json.loads(file.read(length))
+        start = _aligned(len(MAGIC) + 4 + length)
+        self.close()
+        self.channels, self.size = header.pop("channels"), header.pop("size")
+        for entry in header.pop("phrases"):
+            if entry["index"] < len(self) and entry["frames"] > 0:
+                shape = (entry["frames"], self.channels)
+                offset = start + entry["offset"]
+                data = memmap(path, float32, "c", offset=offset, shape=shape)
+                self._data[entry["index"]] = self._buffers[entry["index"]] = data
+        return header
+
+    def close(self):
+        """Releases every buffer and its backing file"""
+        for idx, path in enumerate(self._files):
+            self._data[idx] = self._buffers[idx] = None
+            if path is not None:
+                os.remove(path)
+        self._files = [None] * len(self)
+
+    def _grow(self, idx: int, buffer: Optional[ndarray]):
+        capacity = -(-self.size // self.chunk) * self.chunk
+        path = self._files[idx]
+        if path is not None:  # the file grows, its audio stays in place
+            with open(path, "r+b") as file:
+                file.truncate(capacity * self.channels * 4)
+            fresh = memmap(path, float32, "r+", shape=(capacity, self.channels))
+        else:  # in memory, or mapped from a set file
+            if buffer is None and self.directory is None:
+                capacity += self.chunk  # grows by a chunk without copying
+            fresh, path = self._allocate(idx, capacity)
+            if buffer is not None:
+                fresh[: len(buffer)] = buffer
+        self._buffers[idx], self._files[idx] = fresh, path
+        return fresh
+
+    def _allocate(self, idx: int, frames: int):
+        shape = (frames, self.channels)
+        if self.directory is None or frames == 0:
+            return zeros(shape, dtype=float32), None
+        name = "phrase-%02i-%i.f32" % (idx, next(self._ids))
+        path = os.path.join(self.directory, name)
+        return memmap(path, dtype=float32, mode="w+", shape=shape), path
+
+
+def _aligned(size: int):
+    return -(-size // ALIGN) * ALIGN
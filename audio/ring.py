@@ -0,0 +1,52 @@
+from numpy import ndarray, zeros, float32
+
+
+class RingBuffer:
+    """Single producer / single consumer ring of audio frames.
+
+    The producer only moves `written` and the consumer only moves `read`,
+    each with a single attribute store, so none of them ever waits on a lock.
+    Blocks that don't fit are dropped and counted, never waited for.
+    """
+
+    def __init__(self, frames: int, channels=8):
+        self.capacity = frames
+        self.channels = channels
+        self.written = 0
+        self.read = 0
+        self.overruns = 0  # dropped blocks
+        self.dropped = 0  # dropped frames
+        self.peak = 0  # highest fill seen, to size the ring
+        self._data = zeros((frames, channels), dtype=float32)
+
+    @property
+    def fill(self):
+        return self.written - self.read
+
+    def push(self, block: ndarray):
+        """Copies a block in (producer side), returns False on overrun"""
+        frames = len(block)
+        written = self.written
+        fill = written - self.read
+        if self.capacity - fill < frames:
+            self.overruns += 1
+            self.dropped += frames
+            return False
+        start = written % self.capacity
+        split = min(frames, self.capacity - start)
+        self._data[start : start + split] = block[:split, : self.channels]
+        self._data[: frames - split] = block[split:, : self.channels]
+        self.written = written + frames  # publishes the block to the consumer
+        self.peak = max(self.peak, fill + frames)
+        return True
+
+    def pull(self, out: ndarray):
+        """Copies up to len(out) frames out (consumer side), returns the count"""
+        read = self.read
+        frames = min(len(out), self.written - read)
+        start = read % self.capacity
+        split = min(frames, self.capacity - start)
+        out[:split] = self._data[start : start + split]
+        out[split:frames] = self._data[: frames - split]
+        self.read = read + frames  # releases the frames to the producer
+        return frames
@@ -0,0 +1,107 @@
+import threading
+from collections import deque
+from typing import Optional
+from numpy import array, float64
+
+
+class ClockTimeline:
+    """Linear fit of the MIDI clock ticks times: t = origin + n * period.
+
+    Smooths the arrival jitter of the ticks, so a loop boundary is placed at
+    the fitted time of its tick and the tempo is read from the fitted period.
+    The fit runs over the last `window` ticks, and restarts after a gap.
+    It is ticked by the port reader thread, and read by the clock thread.
+    """
+
+    def __init__(self, ppqn=24, window=96, gap=1.0):
+        self.ppqn = ppqn
+        self.gap = gap
+        self._ticks: "deque[tuple[int, float]]" = deque(maxlen=window)
+        self._count = 0
+        self._fit: "Optional[tuple[float, float]]" = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._ticks)
+
+    def tick(self, t: float):
+        """Records the arrival time of a tick, returns its index"""
+        with self._lock:
+            if self._ticks and t - self._ticks[-1][1] > self.gap:
+                self._ticks.clear()  # clock stopped, tempo may have changed
+            self._ticks.append((self._count, t))
+            self._count += 1
+            self._fit = None
+            return self._count - 1
+
+    @property
+    def fit(self):
+        """(origin, period) of the ticks, period is 0 until 2 ticks"""
+        with self._lock:
+            if self._fit is None:
+                ticks = array(self._ticks, dtype=float64)
+                if len(ticks) < 2:
+                    self._fit = (ticks[0, 1] if len(ticks) else 0.0), 0.0
+                else:
+                    n, t = ticks[:, 0], ticks[:, 1]
+                    dn, dt = n - n.mean(), t - t.mean()
+                    period = float((dn * dt).sum() / (dn * dn).sum())
+                    self._fit = float(t.mean() - period * n.mean()), period
+            return self._fit
+
+    @property
+    def period(self):
+        return self.fit[1]
+
+    @property
+    def bpm(self):
+        period = self.period
+        return 60 / (period * self.ppqn) if period > 0 else 0.0
+
+    def time_of(self, n: Optional[int] = None):
+        """Fitted time of a tick (default: the last one)"""
+        if n is None:
+            n = self._count - 1
+        origin, period = self.fit
+        if period == 0:
+            return origin
+        return origin + n * period
+
+    def time_at(self, n: int, now: float):
+        """Fitted time of a tick, None unless the clock runs: 2 ticks at least,
+        the last one less than `gap` seconds ago"""
+        with self._lock:
+            last = self._ticks[-1][1] if len(self._ticks) > 1 else None
+        if last is None or now - last > self.gap:
+            return None
+        return self.time_of(n)
+
+
+class SampleClock:
+    """Sample position of the audio stream at a given time.
+
+    Each callback gives the time it runs at and its first sample: a callback
+    can only run late, so the earliest stream origin over the last `window`
+    callbacks is kept, which also follows the drift between both clocks.
+    """
+
+    def __init__(self, samplerate: float, window=64):
+        self.samplerate = samplerate
+        self.position = 0  # samples since the stream started
+        self.origin: "Optional[float]" = None
+        self._origins: "deque[float]" = deque(maxlen=window)
+
+    def block(self, t: float, frames: int):
+        """Called by the audio callback, returns the block first sample"""
+        start = self.position
+        self._origins.append(t - start / self.samplerate)
+        self.origin = min(self._origins)
+        self.position += frames
+        return start
+
+    def sample_at(self, t: float):
+        """Sample of the stream playing at the time t"""
+        origin = self.origin
+        if origin is None:
+            return self.position
+        return round((t - origin) * self.samplerate)
@@ -0,0 +1,91 @@
+import os
+import time
+import wave
+import logging
+import threading
+from numpy import clip, zeros, float32, int16
+from audio.mixer import STRINGS
+from audio.ring import RingBuffer
+
+
+def channel_name(ch: int):
+    """Names a 0-based input channel: 6 strings, then the SY-1000 main out"""
+    if ch < STRINGS:
+        return "string%i" % (ch + 1)
+    return ("out-L", "out-R")[ch - STRINGS] if ch < STRINGS + 2 else "ch%i" % (ch + 1)
+
+
+class TakeWriter(threading.Thread):
+    """Drains the ring buffer to 16-bit WAV files, away from the audio thread.
+
+    Each take is one multichannel file, plus one mono file per channel when
+    `split` is set, named after its string or output. Files are opened on the
+    first frames of a take.
+    """
+
+    def __init__(
+        self, ring: RingBuffer, directory: str, samplerate: int, split=False
+    ):
+        super().__init__(name="[AUD] Take writer", daemon=True)
+        self.ring = ring
+        self.directory = directory
+        self.samplerate = int(samplerate)
+        self.split = split
+        self.interval = 0.05
+        self._files: list[wave.Wave_write] = []
+        self._cut = False
+        self._done = threading.Event()
+        self._block = zeros((max(1, ring.capacity // 4), ring.channels), float32)
+        os.makedirs(directory, exist_ok=True)
+
+    def cut(self):
+        """Ends the current take once the pending frames are written"""
+        self._cut = True
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            self._drain()
+        self._drain()
+        self._close()
+
+    def _drain(self):
+        cut = self._cut
+        frames = self.ring.pull(self._block)
+        while frames > 0:
+            if not self._files:
+                self._open()
+            pcm = (clip(self._block[:frames], -1, 1) * 32767).astype(int16)
+            self._files[0].writeframes(pcm.tobytes())
+            for ch, file in enumerate(self._files[1:]):
+                file.writeframes(pcm[:, ch].tobytes())
+            frames = self.ring.pull(self._block)
+        if cut:
+            self._cut = False
+            self._close()
+
+    def _open(self):
+        name = os.path.join(self.directory, time.strftime("take-%Y%m%d-%H%M%S"))
+        paths = [(name + ".wav", self.ring.channels)]
+        if self.split:
+            names = map(channel_name, range(self.ring.channels))
+            paths += [("%s-%s.wav" % (name, ch), 1) for ch in names]
+        for path, channels in paths:
+            file = wave.open(path, "wb")
+            file.setnchannels(channels)
+            file.setsampwidth(2)
+            file.setframerate(self.samplerate)
+            self._files.append(file)
+        logging.info("[AUD] Writing take to %s.wav", name)
+
+    def _close(self):
+        for file in self._files:
+            file.close()
+        if self._files:
+            ring = self.ring
+            infos = [ring.overruns, ring.dropped, ring.peak, ring.capacity]
+            logging.info("[AUD] Take closed (%i overruns, %i lost, %i/%i peak)", *infos)
+        self._files = []
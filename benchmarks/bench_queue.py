@@ -0,0 +1,38 @@
+"""Replays a 10k messages init burst through the MessageQueue.
+
+    python -m benchmarks.bench_queue
+"""
+import timeit
+from midi.messages import MessageQueue, MidiCC, MidiNote, SysexCmd
+
+
+def burst(size=10000):
+    messages = []
+    for i in range(size):
+        kind = i % 4
+        if kind == 0:
+            messages.append(MidiCC(i % 9, 48 + i % 8, i % 128))
+        elif kind == 1:
+            messages.append(MidiNote(i % 8, 53 + i % 5, 127 * (i % 2)))
+        elif kind == 2:
+            messages.append(SysexCmd("patch", [22, i % 128, 0, 0, 0, 1]))
+        else:
+            messages.append(MidiCC(i % 9, 16 + i % 8, i % 128))
+    return messages
+
+
+def replay(messages):
+    queue = MessageQueue()
+    for msg in messages:
+        queue.add(msg)
+    return sum(1 for _ in queue)
+
+
+if __name__ == "__main__":
+    messages = burst()
+    runs = 20
+    total = timeit.timeit(lambda: replay(messages), number=runs)
+    print("%i messages -> %i out" % (len(messages), replay(messages)))
+    per_burst = total / runs
+    per_msg = per_burst / len(messages)
+    print("%.2f ms per burst (%.2f us per message)" % (per_burst * 1e3, per_msg * 1e6))
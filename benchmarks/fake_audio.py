@@ -0,0 +1,99 @@
+"""Stand-in for the `sounddevice` module, to run the recorder headless.
+
+    fake_audio.install()  # before importing `devices`
+
+The stream callback is called by a thread at the block rate with a test
+tone as input, like an audio interface would. Late blocks are flagged as
+output underflows.
+"""
+import sys
+import time
+import threading
+from typing import Callable, Optional
+from numpy import arange, float32, pi, sin, zeros
+
+
+class CallbackStop(Exception):
+    pass
+
+
+class CallbackFlags:
+    def __init__(self, **flags: bool):
+        self.__dict__.update(flags)
+
+    def __bool__(self):
+        return any(self.__dict__.values())
+
+
+def query_devices(device=None, kind=None):
+    return dict(name=device, max_input_channels=8, default_samplerate=48000.0)
+
+
+class Stream:
+    def __init__(
+        self,
+        device=None,
+        channels=8,
+        samplerate=48000.0,
+        dtype=float32,
+        callback: Optional[Callable] = None,
+        blocksize=256,
+        **_,
+    ):
+        self.device = device
+        self.channels = channels, channels
+        self.samplerate = samplerate
+        self.dtype = dtype
+        self.blocksize = blocksize
+        self.callback = callback
+        self.closed = False
+        self.active = False
+        self.underflows = 0
+        self._thread: "threading.Thread | None" = None
+
+    def start(self):
+        if self.active or self.callback is None:
+            return
+        self.active = True
+        self._thread = threading.Thread(
+            target=self._run, name="[AUD] Fake stream", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self.active = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def close(self):
+        self.stop()
+        self.closed = True
+
+    def _run(self):
+        frames, channels = self.blocksize, self.channels[0]
+        period = frames / self.samplerate
+        tone = sin(2 * pi * 440 * arange(frames) / self.samplerate) * 0.1
+        indata = zeros((frames, channels), dtype=float32)
+        indata[:] = tone[:, None]
+        outdata = zeros((frames, channels), dtype=float32)
+        status = CallbackFlags()
+        deadline = time.monotonic()
+        while self.active:
+            try:
+                self.callback(indata, outdata, frames, None, status)  # type: ignore
+            except CallbackStop:
+                break
+            deadline += period
+            wait = deadline - time.monotonic()
+            status = CallbackFlags(output_underflow=wait < 0)
+            if wait > 0:
+                time.sleep(wait)
+            else:
+                self.underflows += 1
+                deadline = time.monotonic()
+        self.active = False
+
+
+def install():
+    """Makes `import sounddevice` load this module"""
+    sys.modules["sounddevice"] = sys.modules[__name__]
@@ -0,0 +1,322 @@
+"""Headless end-to-end benchmarks of the devices, as `main.py` runs them.
+
+The MIDI ports are loopback ports, the audio stream is simulated, and an
+emulated SY-1000 answers the sysex requests. Reports the latency from a
+message injected into a port to the first message it causes on an output,
+the throughput of bursts, and the CPU time of each thread.
+
+    python -m benchmarks.harness [--quick] [--input event|poll] [--trust]
+                                 [--json FILE]
+    python -m benchmarks.harness --replay TRACE [--speed 2]  # a MIDI_TRACE file
+"""
+import os
+import re
+import json
+import time
+import logging
+import argparse
+import threading
+import statistics
+import mido
+from benchmarks import fake_audio, traces
+from benchmarks.loopback import hub
+from bridge import Bridge
+from midi.trace import TraceReplay, TraceWriter
+from instruments.cache import PatchCache
+
+fake_audio.install()
+
+from midi import MidiDevice  # noqa: E402
+from devices import APC40, SY1000, Metronome, Recorder  # noqa: E402
+
+SYNTH, CONTROL, AUDIO = "SY-1000 MIDI 1", "Akai APC40 MIDI 1", "SY-1000"
+
+
+class SynthEmulator:
+    """Answers the SY1000 requests (RQ1) with data (DT1), like the SY-1000"""
+
+    def __init__(self, types=(0, 0, 0, 0)):
+        self.patch = 0
+        self.types = dict(zip([10, 21, 32, 43], types))
+        self.requests = 0
+        hub.listen(SYNTH, self.receive)
+
+    def receive(self, msg: mido.Message):
+        if msg.type != "sysex" or list(msg.data[:6]) != [65, 0, 0, 0, 0, 105]:
+            return
+        address = list(msg.data[7:11])
+        if msg.data[6] == 17:
+            self.requests += 1
+            size = 0
+            for byte in msg.data[11:15]:
+                size = size * 128 + byte
+            self.answer(address, self.values(address, size))
+        elif address == [0, 1, 0, 0]:  # patch number set
+            self.patch = int("".join("%x" % n for n in msg.data[11:15]), 16)
+            hub.inject(SYNTH, mido.Message("program_change", program=self.patch % 128))
+
+    def values(self, address: "list[int]", size: int):
+        if address == [0, 1, 0, 0]:
+            return [int(n, 16) for n in "%04x" % self.patch]
+        if address[0] == 16 and address[3] == 1 and address[2] in self.types:
+            return [self.types[address[2]], 100][:size]
+        linear = ((address[0] * 128 + address[1]) * 128 + address[2]) * 128
+        linear += address[3] + self.patch
+        return [(linear + i) % 128 for i in range(size)]
+
+    def answer(self, address: "list[int]", values: "list[int]"):
+        checksum = -sum(address + values) % 128
+        data = [65, 0, 0, 0, 0, 105, 18, *address, *values, checksum]
+        hub.inject(SYNTH, mido.Message("sysex", data=data))
+
+
+def sent(port: str, since: float, select=lambda msg: True):
+    return [(t, msg) for t, msg in list(hub.sent[port]) if t >= since and select(msg)]
+
+
+def settle(quiet=0.25, timeout=10.0):
+    """Waits until no port sent anything for `quiet` seconds, returns the time
+    of the last message sent since the call (None if there was none)"""
+    start = time.monotonic()
+    while time.monotonic() - start < timeout:
+        idle = time.monotonic() - max(hub.last, start)
+        if idle >= quiet:
+            break
+        time.sleep(quiet - idle)
+    return hub.last if hub.last >= start else None
+
+
+def play(port: str, trace: "list[tuple[float, mido.Message]]"):
+    """Injects a trace with its timing, returns the injection times"""
+    start = time.monotonic()
+    times = []
+    for offset, msg in trace:
+        wait = start + offset - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        times.append(hub.inject(port, msg))
+    return times
+
+
+def first_after(port: str, since: float, timeout=1.0, select=lambda msg: True):
+    """Time of the first message sent on a port after `since`"""
+    deadline = since + timeout
+    while True:
+        messages = sent(port, since, select)
+        if messages:
+            return messages[0][0]
+        if time.monotonic() > deadline:
+            return None
+        time.sleep(0.0002)
+
+
+def summary(latencies: "list[float]"):
+    if not latencies:
+        return dict(count=0)
+    ms = sorted(t * 1e3 for t in latencies)
+    return dict(
+        count=len(ms),
+        p50=statistics.median(ms),
+        p95=ms[min(len(ms) - 1, int(len(ms) * 0.95))],
+        max=ms[-1],
+    )
+
+
+def thread_cpu():
+    """CPU seconds of the running threads, by name (Linux only)"""
+    cpu: "dict[str, float]" = {}
+    tick = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+    for thread in threading.enumerate():
+        try:
+            with open("/proc/self/task/%i/stat" % thread.native_id) as file:
+                fields = file.read().rsplit(")", 1)[1].split()
+        except (OSError, TypeError):
+            continue
+        name = re.sub(r"-\d+(_\d+)?( \(.*\))?$", "", thread.name)
+        cpu[name] = cpu.get(name, 0.0) + (int(fields[11]) + int(fields[12])) / tick
+    return cpu
+
+
+def patch_loads(emulator: SynthEmulator, patches: "list[int]"):
+    """Program changes, from the SY-1000 port to the last LED or request"""
+    results = []
+    for _, msg in traces.patch_changes(patches):  # each load settles first
+        emulator.patch, requests = msg.program, emulator.requests
+        start = hub.inject(SYNTH, msg)
+        end = settle() or start
+        leds = len(sent(CONTROL, start))
+        infos = dict(patch=msg.program, ms=(end - start) * 1e3, leds=leds)
+        results.append(dict(infos, requests=emulator.requests - requests))
+    return results
+
+
+def knob_latency(count: int):
+    """APC40 knob moves, one at a time, to the SY-1000 sysex they cause"""
+    latencies = []
+    for i in range(count):
+        msg = mido.Message("control_change", control=48, value=(i * 7) % 128)
+        start = hub.inject(CONTROL, msg)
+        end = first_after(SYNTH, start, select=lambda m: m.type == "sysex")
+        if end is not None:
+            latencies.append(end - start)
+        settle(0.02)
+    return summary(latencies)
+
+
+def knob_sweeps(sweeps: int):
+    """Fast knob sweeps, coalesced on their way to the SY-1000"""
+    trace = traces.knob_sweep(sweeps=sweeps)
+    times = play(CONTROL, trace)
+    end = settle() or times[-1]
+    out = sent(SYNTH, times[0], lambda m: m.type == "sysex")
+    return dict(
+        inputs=len(times),
+        outputs=len(out),
+        drain_ms=(end - times[-1]) * 1e3,
+        throughput=len(times) / max(end - times[0], 1e-9),
+    )
+
+
+def clock(metronome: Metronome, bpm: float, beats: int):
+    """Clock ticks to the APC40 beat LEDs"""
+    trace = traces.clock(bpm, beats)
+    times = play(SYNTH, trace)
+    settle()
+    beat = lambda m: m.type == "note_on" and m.note == 65 and m.velocity > 0
+    latencies = []
+    for n in range(0, len(times), 24):  # the start, then every 24 ticks
+        end = first_after(CONTROL, times[n], 0, beat)
+        if end is not None and (n + 24 >= len(times) or end < times[n + 24]):
+            latencies.append(end - times[n])
+    return dict(summary(latencies), bpm=bpm, fitted=metronome.timeline.bpm)
+
+
+def replay(file: str, speed: float, ports: "dict[str, str]"):
+    """A captured trace, fed to the ports of the devices that received it"""
+    trace = TraceReplay(file, speed)
+    start = time.monotonic()
+    late = trace.play(lambda dev, msg: dev in ports and hub.inject(ports[dev], msg))
+    end = settle() or time.monotonic()
+    return dict(
+        inputs=len(trace.records),
+        outputs={port: len(sent(port, start)) for port in set(ports.values())},
+        ms=(end - start) * 1e3,
+        late=summary(late),
+    )
+
+
+def run(
+    quick=False,
+    input_mode="event",
+    trace=None,
+    replay_file=None,
+    speed=1.0,
+    trust=False,
+):
+    mido.set_backend("benchmarks.loopback", load=True)
+    MidiDevice.input_mode = input_mode
+    SY1000.cache = PatchCache(trust=trust)
+    if trace is not None:
+        Bridge.trace = TraceWriter(trace)
+    if replay_file is None:  # a trace has the SY-1000 replies
+        emulator = SynthEmulator()
+    control = APC40(CONTROL, 0)
+    synth = SY1000(SYNTH, 0)
+    audio = Recorder(AUDIO, 16, 8)
+    metronome = Metronome(synth)
+    metronome.bars = 1
+    runner = threading.Thread(
+        target=metronome.start, args=(control, synth, audio), daemon=True
+    )
+    runner.start()
+    audio.start()
+    settle(0.5)
+    cpu = thread_cpu()
+    if replay_file is not None:
+        ports = {control.name: CONTROL, synth.name: SYNTH, metronome.name: SYNTH}
+        results = dict(replay=replay(replay_file, speed, ports))
+    else:
+        patches = patch_loads(emulator, [1, 2, 1, 2])
+        hub.inject(CONTROL, mido.Message("note_on", note=88))  # instrument page 1
+        settle()
+        results = dict(
+            patches=patches,
+            knob=knob_latency(20 if quick else 100),
+            sweeps=knob_sweeps(1 if quick else 4),
+            clock=[
+                clock(metronome, bpm, 4 if quick else 8)
+                for bpm in ([120, 240] if quick else [40, 120, 240])
+            ],
+        )
+    results["audio"] = dict(audio.metrics.snapshot(), underflows=audio.underflows)
+    end_cpu = thread_cpu()
+    results["cpu"] = {k: v - cpu.get(k, 0.0) for k, v in end_cpu.items()}
+    audio.close()
+    for device in [control, synth]:
+        device.inport.close()
+    runner.join(2)
+    if Bridge.trace is not None:
+        Bridge.trace.close()
+    return results
+
+
+def report(results: dict):
+    if "replay" in results:
+        replayed = results["replay"]
+        print("Replay: %(inputs)i messages in %(ms).1f ms" % replayed)
+        for port, count in replayed["outputs"].items():
+            print("  %s: %i messages sent" % (port, count))
+        if replayed["late"]["count"]:
+            print("  lateness: p95 %(p95).2f ms, max %(max).2f ms" % replayed["late"])
+    else:
+        report_scenarios(results)
+    audio = results["audio"]
+    print(
+        "Audio: %(callbacks)i callbacks, %(peak).1f%% peak budget, %(xruns)i xruns"
+        % dict(audio, peak=audio["peak"] * 100)
+    )
+    print("CPU (s):")
+    for name, seconds in sorted(results["cpu"].items(), key=lambda kv: -kv[1]):
+        if seconds > 0:
+            print("  %-32s %.2f" % (name, seconds))
+
+
+def report_scenarios(results: dict):
+    print("Patch loads (program change -> last message):")
+    for load in results["patches"]:
+        line = "  patch %(patch)i: %(ms).1f ms, %(requests)i requests, %(leds)i LEDs"
+        print(line % load)
+    knob = results["knob"]
+    if knob["count"]:
+        line = "Knob -> sysex (%(count)i): p50 %(p50).2f ms, p95 %(p95).2f ms"
+        print(line % knob + ", max %(max).2f ms" % knob)
+    sweeps = results["sweeps"]
+    print(
+        "Knob sweeps: %(inputs)i CC -> %(outputs)i sysex, %(throughput).0f msg/s, "
+        "%(drain_ms).1f ms to drain" % sweeps
+    )
+    for clock in results["clock"]:
+        line = "Clock %(bpm)i BPM (fitted %(fitted).1f)" % clock
+        if clock["count"]:
+            line += ": beat LED p50 %(p50).2f ms, p95 %(p95).2f ms" % clock
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="fewer, shorter runs")
+    parser.add_argument("--input", default="event", choices=["event", "poll"])
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--trace", help="captures the messages to this trace file")
+    parser.add_argument("--replay", help="replays this trace file instead")
+    parser.add_argument("--speed", type=float, default=1.0, help="0: no waits")
+    parser.add_argument("--trust", action="store_true", help="trust the patch cache")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    results = run(
+        args.quick, args.input, args.trace, args.replay, args.speed, args.trust
+    )
+    report(results)
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
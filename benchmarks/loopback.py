@@ -0,0 +1,77 @@
+"""Loopback mido backend: virtual ports living in this process.
+
+    mido.set_backend("benchmarks.loopback", load=True)
+
+Messages are injected into the inputs with `hub.inject`, and what the
+devices send is logged with its time in `hub.sent`, or handed to listeners.
+"""
+import time
+import threading
+from collections import deque
+from typing import Callable
+import mido
+import mido.ports
+
+
+class Hub:
+    def __init__(self):
+        self.inputs: "dict[str, deque[mido.Message]]" = {}
+        self.sent: "dict[str, list[tuple[float, mido.Message]]]" = {}
+        self.listeners: "dict[str, list[Callable[[mido.Message], None]]]" = {}
+        self.last = 0.0  # time of the last message sent on any port
+        self._lock = threading.Lock()
+
+    def add(self, name: str):
+        with self._lock:
+            self.inputs.setdefault(name, deque())
+            self.sent.setdefault(name, [])
+            self.listeners.setdefault(name, [])
+
+    def inject(self, name: str, msg: mido.Message):
+        """Message received by the input port, returns its time"""
+        now = time.monotonic()
+        self.inputs[name].append(msg)
+        return now
+
+    def listen(self, name: str, callback: Callable[[mido.Message], None]):
+        """Calls back with each message sent on the output port"""
+        self.add(name)
+        self.listeners[name].append(callback)
+
+    def send(self, name: str, msg: mido.Message):
+        self.last = now = time.monotonic()
+        self.sent[name].append((now, msg))
+        for callback in self.listeners[name]:
+            callback(msg)
+
+
+hub = Hub()
+
+
+def get_devices(**_):
+    return [dict(name=name, is_input=True, is_output=True) for name in hub.inputs]
+
+
+class Input(mido.ports.BaseInput):
+    def _open(self, **_):
+        hub.add(self.name)
+        self._queue = hub.inputs[self.name]
+
+    def _receive(self, block=True):
+        try:
+            return self._queue.popleft()
+        except IndexError:
+            return None
+
+
+class Output(mido.ports.BaseOutput):
+    def _open(self, **_):
+        hub.add(self.name)
+
+    def _send(self, msg: mido.Message):
+        hub.send(self.name, msg)
+
+
+class IOPort(mido.ports.IOPort):
+    def __init__(self, name, **kwargs):
+        super().__init__(Input(name, **kwargs), Output(name, **kwargs))
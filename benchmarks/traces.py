@@ -0,0 +1,24 @@
+"""Generated MIDI traces: lists of (time offset in seconds, message)."""
+import mido
+
+
+def knob_sweep(control=48, channel=0, interval=0.0005, sweeps=2):
+    """A knob turned from 0 to 127 and back, `sweeps` times"""
+    values = [*range(0, 128), *range(127, -1, -1)] * sweeps
+    cc = dict(type="control_change", channel=channel, control=control)
+    return [(i * interval, mido.Message(value=v, **cc)) for i, v in enumerate(values)]
+
+
+def clock(bpm: float, beats: int):
+    """A start followed by `beats` beats of 24 ppqn clock ticks"""
+    period = 60 / (bpm * 24)
+    ticks = [(n * period, mido.Message("clock")) for n in range(1, beats * 24 + 1)]
+    return [(0.0, mido.Message("start")), *ticks]
+
+
+def patch_changes(patches: "list[int]", interval=1.0):
+    """Program changes to each patch in turn"""
+    return [
+        (i * interval, mido.Message("program_change", program=patch % 128))
+        for i, patch in enumerate(patches)
+    ]
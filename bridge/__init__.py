@@ -4,12 +4,16 @@ import reactivex.operators as ops
 from reactivex.abc import DisposableBase
 from reactivex.disposable import SingleAssignmentDisposable
 from reactivex.subject import Subject
-from typing import MutableSet
+from typing import TYPE_CHECKING, MutableSet, Optional
 from utils import doubleclick, to_observable
 
+if TYPE_CHECKING:
+    from midi.trace import TraceWriter
+
 
 class Bridge(Subject):
     _subs: MutableSet[DisposableBase] = set()
+    trace: "Optional[TraceWriter]" = None  # captures the messages when set
 
     def __init__(self, name):
         super(Bridge, self).__init__()
@@ -35,14 +39,20 @@ class Bridge(Subject):
             return rx.never()
         messages = getattr(self, method)(msg)
         return to_observable(messages)
-        
+
+    def record(self, direction: str, msg):
+        """Writes a message to the trace, if there is one"""
+        if self.trace is not None:
+            self.trace.record(direction, self.name, msg)
 
     def connect(self, device: "Bridge"):
         return (
             rx.Observable(self.receive)
             if self.name == device.name
             else device.pipe(
-                ops.filter(self.external_message), ops.flat_map(self.to_messages)
+                ops.filter(self.external_message),
+                ops.do_action(lambda msg: self.record("in", msg)),
+                ops.flat_map(self.to_messages),
             )
         )
 
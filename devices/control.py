@@ -1,4 +1,8 @@
+import mido
+import reactivex as rx
+import reactivex.operators as ops
 from midi import MidiDevice, make_notes
+from midi.frame import FLUSH, Frame
 from midi.messages import MidiNote, MidiCC
 from instruments.messages import (
     InternalMessage as Msg,
@@ -11,7 +15,7 @@ from instruments.blocks import Block, Nav, CCBlock, Stack, Pager, StringBlock
 
 class APC40(MidiDevice):
     blinks: "set[int]" = set([65])
-    strings = StringBlock(16, 4), StringBlock(20, 4)
+    strings = StringBlock(16, (4, 9)), StringBlock(20, (4, 9))
     blocks = Nav(
         "instr",
         87,
@@ -29,8 +33,43 @@ class APC40(MidiDevice):
         ),
     )
 
+    refresh = 0.02  # LEDs refresh tick, in seconds
+    immediate = ["beat", "start", "note_on", "note_off"]  # shown without waiting
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.frame = Frame()
+
+    def send(self, msg):
+        """LEDs and knob rings only send their changes, once per refresh tick"""
+        if msg is FLUSH:
+            return self.flush()
+        if not isinstance(msg, mido.Message) or not self.frame.put(msg):
+            return super().send(msg)
+        if self.frame.request():  # from the APC40 loop and the clock thread
+            self.topology.pool.schedule_relative(self.refresh, self._refresh)
+
+    def _refresh(self, *_):
+        self.flush()
+
+    def flush(self):
+        """Sends the changes now, not on the next refresh tick"""
+        for msg in self.frame.refresh():
+            super().send(msg)
+
+    def to_messages(self, msg):
+        messages = super().to_messages(msg)
+        if msg is not None and msg.type in self.immediate:  # beat blink, pads
+            return messages.pipe(ops.flat_map(lambda m: rx.of(m, FLUSH)))
+        return messages
+
+    def on_completed(self):
+        self.frame.clear()  # shutting down, a restart redraws it all
+        super().on_completed()
+
     @property
     def init_actions(self):
+        self.frame.clear()  # the surface is reset, everything is drawn
         for ch in range(0, 8):
             yield MidiCC(ch, 7, 127)
             for ctl in range(16, 20):
@@ -58,6 +97,7 @@ class APC40(MidiDevice):
         return lambda msg: msg.type in controls
 
     def _control_change_in(self, msg: MidiCC):
+        self.frame.seen(msg)  # the knob ring already shows the new value
         channel = msg.channel
         control = msg.control
         value = msg.value
@@ -77,7 +117,7 @@ class APC40(MidiDevice):
         elif control == 67:  # footswitch 2
             yield Msg("stop", None)
         if block is not None:
-            block.current = control, channel, value
+            block.current = control + 128, channel, value
             yield from block.message(control + 128, channel, value)
 
     def _note_on_in(self, msg: MidiNote):
@@ -93,7 +133,7 @@ class APC40(MidiDevice):
         elif note == 50:  # bars
             yield MacroMessage("bars", self.blocks.root.row_idx, msg.channel + 1)
         elif note == 58:  # clip
-            pass
+            yield Msg("save")
         elif note == 59:  # device
             pass
         elif note == 60:  # <=
@@ -148,20 +188,19 @@ class APC40(MidiDevice):
         return res
 
     def _strings_in(self, msg: StringMessage):
-        block = self.strings[int(msg.macro < 20)]
+        block = self.strings[int(msg.macro >= self.strings[1].macro)]
         yield from block.set(self.channel, msg.macro, *msg.values)
 
     def _synth_in(self, msg: MacroMessage):
         yield from self.blocks.set(msg.idx, msg.macro, msg.value)
 
     def _steps_in(self, msg: StepMessage):
-        target = self.blocks.get(msg.idx, msg.macro)
+        target = self.blocks.get(msg.idx, msg.value)  # instrument target nav
         if isinstance(target, Nav):
-            page = msg.macro - target.macro
-            for col, values in enumerate(msg.steps):
-                for row, value in enumerate(values):
-                    target.set(page, 53, row, col, value)
-            yield from target.set(page, msg.macro, msg.value)
+            page = msg.value - target.macro
+            messages = target.set_grid(page, msg.macro, msg.grid)
+            if msg.idx == self.blocks.row_idx:
+                yield from messages
 
     def _seq_in(self, msg: MacroMessage):
         yield from self.blocks.set(msg.idx, msg.macro, msg.value)
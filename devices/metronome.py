@@ -1,11 +1,13 @@
+import time
 import logging
 import threading
 import reactivex as rx
 import reactivex.operators as ops
 from reactivex.disposable import CompositeDisposable
-from reactivex.scheduler import EventLoopScheduler
+from audio import ClockTimeline
 from bridge import Bridge
 from midi import MidiDevice
+from midi.clock import CLOCK_TYPES, ClockFanout
 from instruments.messages import InternalMessage as Msg
 from utils import clip, t2i, scroll
 
@@ -19,6 +21,10 @@ class Metronome(MidiDevice):
     def __init__(self, device: MidiDevice):
         super().__init__(device)
         self.name = "[TEM] Metronome"
+        self.timeline = ClockTimeline()
+        self.fanout = ClockFanout(self.server, self.timeline)  # ticks the timeline
+        self._tick = -1  # timeline index of the last clock
+        self._at = 0  # timeline index of the current message
 
     @property
     def select_message(self):
@@ -82,21 +88,40 @@ class Metronome(MidiDevice):
     def size(self):
         return self.bars * 4 * 24
 
-    def receive(self, observer, scheduler):
+    def receive(self, observer, _=None):
         def clocker(acc, msg):
             return 0 if msg.type == "start" else scroll(acc + 1, 0, self.size - 1)
 
-        # inport iterable is blocking code, need to use a dedicated thread for a nice sync
-        clock, messages = rx.from_iterable(self.inport, EventLoopScheduler()).pipe(
+        # the port reader thread fans the clock out to the network (all of it,
+        # stop/continue too), ticks the timeline, and hands it over, other
+        # messages go to the devices sharing the port (in both modes)
+        inport = self.reader.iterate(
+            lambda msg: msg.type in CLOCK_TYPES, self.fanout.send
+        )
+        # inport iterable is blocking code, it runs on the clock thread for a nice
+        # sync, and so do the beats: they are emitted right away, not scheduled on
+        # the clock loop, which is blocked waiting for the next tick
+        clock, messages = rx.from_iterable(inport, self.topology.clock).pipe(
             ops.partition(self.select_message),
         )
-        # now the clock can run the common thread
         return clock.pipe(
-            ops.do_action(self.server.send),
+            ops.do_action(lambda msg: self.record("in", msg)),
+            ops.do_action(self._count),
             ops.scan(clocker, -1),
             ops.flat_map(self._beat_in),
-            ops.merge(messages.pipe(ops.map(Msg.to_internal_message)))
-        ).subscribe(observer, scheduler=scheduler)
+            ops.merge(
+                messages.pipe(
+                    ops.map(Msg.to_internal_message),
+                    ops.filter(lambda msg: msg is not None),
+                )
+            ),
+        ).subscribe(observer)
+
+    def _count(self, msg):
+        """Follows the timeline ticks, a start is placed at the next one"""
+        if msg.type == "clock":
+            self._tick += 1
+        self._at = self._tick + int(msg.type == "start")
 
     def start(self, *devices: Bridge):
         stop_event = threading.Event()
@@ -108,7 +133,7 @@ class Metronome(MidiDevice):
                     on_next=dev.send,
                     on_error=logging.exception,
                     on_completed=stop_event.set,
-                    scheduler=MidiDevice.scheduler,
+                    scheduler=MidiDevice.topology.io(dev.name),
                 )
                 main_disp.add(disp)
             logging.info("%s syncing %i devices", self.name, len(devices))
@@ -122,7 +147,11 @@ class Metronome(MidiDevice):
         if beat % 24 == 0:
             yield Msg("beat")
             if beat == 0:
-                yield Msg("start", self.state, self.bars)
+                # the fitted time of this tick places the loop in the audio, if
+                # the clock runs: a first start or a restart has no ticks to fit
+                at = self.timeline.time_at(self._at, time.monotonic())
+                bpm = self.timeline.bpm
+                yield Msg("start", self.state, self.bars, at, bpm)
         elif self.size - beat == 1:
             yield Msg("end", self.state, self.bars)
 
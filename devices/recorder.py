@@ -1,24 +1,62 @@
+import os
+import time
 import logging
-from numpy import frombuffer, zeros, ones, float32, array
-from audioop import add, mul, tomono, tostereo
-from sounddevice import Stream, CallbackStop, query_devices
+from numpy import ones, float32, array
+from sounddevice import Stream, query_devices
+from audio import (
+    AudioMetrics,
+    MetricsReporter,
+    Mixer,
+    Phrases,
+    RingBuffer,
+    SampleClock,
+    TakeWriter,
+)
 from bridge import Bridge
-from utils import minmax, t2i, retry, scroll
+from midi import MidiDevice
+from utils import log, minmax, t2i, retry, scroll
 
 
 class Recorder(Bridge, Stream):
     x = 0.5
+    bars = 2
+    min_bpm = 40  # sizes the phrases until the clock tempo is known
+    headroom = 1.05
     _phrase = 0
     _volumes = ones(8, dtype=float32)
     _pans = array([0.5] * 8, dtype=float32)
-    _data = zeros((16, 576000, 8), dtype=float32)
-
-    def __init__(self, name, phrases=16, channels=8, samplerate=48000.0):
+    state: "list[str]" = []
+    cursor = 0
+    ring: "RingBuffer | None" = None
+    writer: "TakeWriter | None" = None
+    reporter: "MetricsReporter | None" = None
+    # (state, first sample) of the next loop, set at its start message
+    _next: "tuple[list[str], int | None] | None" = None
+
+    def __init__(
+        self,
+        name,
+        phrases=16,
+        channels=8,
+        samplerate=48000.0,
+        directory=None,
+        takes=None,
+        split=False,
+        file=None,
+        metrics=None,
+        metrics_port=None,
+    ):
         super(Recorder, self).__init__("[AUD] " + name)
         device = retry(query_devices, [name])
         if not isinstance(device, dict):
             device = dict()
-        self._data.resize((phrases, int(samplerate * 12), channels))
+        size = self.loop_size(self.bars, 0, samplerate)
+        self._data = Phrases(phrases, channels, size, directory, int(samplerate))
+        self.file = file
+        if file is not None and os.path.exists(file):
+            self.load(file)
+        self.mixer = Mixer(len(self._volumes))
+        self.mixer.update(self._volumes, self._pans, self.x, smooth=False)
         Stream.__init__(
             self,
             device=device.get("name", name),
@@ -27,14 +65,29 @@ class Recorder(Bridge, Stream):
             dtype=float32,
             callback=self.play_rec,
         )
+        self.clock = SampleClock(self.samplerate)
+        if takes is not None:
+            # 10 seconds of headroom for the disk writer
+            self.ring = RingBuffer(int(self.samplerate * 10), self.channels[0])
+            self.writer = TakeWriter(self.ring, takes, self.samplerate, split)
+            self.writer.start()
+        self.metrics = AudioMetrics(self.samplerate, self.ring)
+        if metrics is not None:
+            self.reporter = MetricsReporter(self.metrics, metrics, metrics_port)
+            self.reporter.start()
         logging.info("%s recording at %i.Hz", self.name, self.samplerate)
 
     def __del__(self):
         self.close()
+        self._data.close()
+        if self.writer is not None:
+            self.writer.stop()
+        if self.reporter is not None:
+            self.reporter.stop()
 
     @property
     def external_message(self):
-        controls = ["start", "stop", "volumes", "phrase", "xfade", "xfader"]
+        controls = ["start", "stop", "volumes", "phrase", "xfade", "xfader", "save"]
         return lambda msg: msg.type in controls
 
     @property
@@ -53,64 +106,115 @@ class Recorder(Bridge, Stream):
 
     @property
     def faders(self):
-        faders = []
-        for ch, vol in enumerate(self._volumes):
-            if ch < 6:  # strings
-                faders += [(vol, self._pans[ch])]
-            elif ch == 6:  # OUT-L
-                faders += [(vol * (1 - self._pans[ch]), None)]
-            elif ch == 7:  # OUT-R
-                faders += [(vol * self._pans[ch], None)]
-        return faders
+        return self.mixer.gains
+
+    def save(self, file: str):
+        """Snapshots the phrases (copies the one recording), a worker writes them"""
+        volumes, pans = self._volumes.tolist(), self._pans.tolist()
+        state = dict(bars=self.bars, phrase=self.phrase, x=self.x)
+        recording = [self.phrase] if "Record" in self.state else []
+        snapshot = self._data.snapshot(recording)
+
+        def write(*_):
+            try:
+                self._data.save(file, snapshot, volumes=volumes, pans=pans, **state)
+                count = len(snapshot)
+                logging.info("%s saved %i phrases to %s", self.name, count, file)
+            except Exception as e:
+                logging.exception(e)
+
+        MidiDevice.topology.pool.schedule(write)
+
+    def load(self, file: str):
+        state = self._data.load(file)
+        self.bars, self._phrase, self.x = state["bars"], state["phrase"], state["x"]
+        self._volumes[:] = state["volumes"]
+        self._pans[:] = state["pans"]
+        count = len(self._data.allocated)
+        logging.info("%s loaded %i phrases from %s", self.name, count, file)
 
     @property
     def is_closed(self):
         return self.closed
 
     def play_rec(self, indata, outdata, frames, _, status):
-        if status:
-            logging.warn(status)
+        now = time.monotonic()
         try:
-            remainder = len(self.data) - self.cursor
-            if remainder <= 0:
-                raise CallbackStop
-            offset = frames if remainder >= frames else remainder
-            buffer = zeros((frames, self.channels[0]), dtype=float32)
-            if "Play" in self.state:
-                buffer[:offset][:] = self.data[self.cursor : self.cursor + offset]
-                buffer[offset:] = 0
-            if "Record" in self.state:
-                self.data[self.cursor : self.cursor + offset] = indata[:offset]
-            for ch, values in enumerate(self.faders):
-                vol, pan = values
-                track_in = indata[:, ch].tobytes()
-                track_out = mul(buffer[:, ch].tobytes(), 4, vol)
-                if pan is not None:  # string pan
-                    stereo = tostereo(track_out, 4, 1 - pan, pan)
-                    track_out = tomono(stereo, 4, 1 - self.x, self.x)
-                outdata[:offset, ch] = frombuffer(
-                    add(track_in, track_out, 4), dtype=float32
-                )
-            outdata[offset:] = 0
-            self.cursor += offset
+            start = self.clock.block(now, frames)
+            buffer = self.mixer.buffer(frames)
+            split = frames
+            loop = self._next
+            if loop is not None:
+                at = start if loop[1] is None else loop[1]
+                split = min(max(at - start, 0), frames)
+            self._play_rec(indata, buffer, 0, split)
+            if loop is not None and split < frames:
+                self._next = None
+                self._loop(*loop, start + split, frames)
+                self._play_rec(indata, buffer, split, frames)
+            self.mixer.mix(indata, outdata)
         except Exception as e:
             logging.exception(e)
+        self.metrics.record(now, time.monotonic(), frames, status)
+
+    def _play_rec(self, indata, buffer, begin: int, end: int):
+        """Plays and records the frames [begin, end) of the block"""
+        data = self.data
+        size = self._data.size if data is None else len(data)
+        offset = min(end - begin, max(size - self.cursor, 0))
+        cursor = self.cursor
+        if data is not None and offset > 0 and "Play" in self.state:
+            buffer[begin : begin + offset] = data[cursor : cursor + offset]
+        if data is not None and offset > 0 and "Record" in self.state:
+            data[cursor : cursor + offset] = indata[begin : begin + offset]
+        if self.ring is not None and "Record" in self.state:
+            self.ring.push(indata[begin:end])
+        self.cursor += end - begin
+
+    def _loop(self, state: "list[str]", at: "int | None", sample: int, frames: int):
+        """Starts the next loop at this sample, late starts are caught up (by less
+        than a block, more means the start time is off)"""
+        if self.writer is not None and "Record" in self.state:
+            if "Record" not in state:
+                self.writer.cut()
+        self.state = state
+        self.cursor = 0 if at is None else min(max(sample - at, 0), frames - 1)
+
+    def loop_size(self, bars: int, bpm: float, samplerate: float):
+        """Frames of a loop at this tempo, with some headroom"""
+        seconds = bars * 4 * 60 / max(bpm, self.min_bpm)
+        return int(seconds * samplerate * self.headroom)
 
     def _start_in(self, msg):
-        self.state, bars = msg.data
-        # '6' is 4 * 60 seconds / 40 BPM (min tempo sets the largest size)
-        maxsize = int(self.samplerate * bars * 6)
-        self._data.resize((len(self._data), maxsize, self.channels[0]))
-        self.cursor = 0
-        label = "ing/".join(self.state)
-        logging.debug("[AUD] %sing %i bars sample (%i chunks)", label, bars, maxsize)
+        state, bars = msg.data[0:2]
+        # a start from the clock has the time of its tick and the tempo
+        t = msg.data[2] if len(msg.data) > 2 else None
+        at = None if t is None else self.clock.sample_at(t)
+        bpm = msg.data[3] if len(msg.data) > 3 else 0
+        self.bars = bars
+        maxsize = self.loop_size(bars, bpm, self.samplerate)
+        self._data.resize(maxsize)
+        if "Record" in state:
+            self._data.arm(self.phrase)
+        self._next = (state, at)
+        if log.enabled:
+            label = "ing/".join(state)
+            infos = [label, bars, maxsize]
+            logging.debug("[AUD] %sing %i bars sample (%i frames)", *infos)
+
+    def _save_in(self, _):
+        if self.file is not None:
+            self.save(self.file)
 
     def _phrase_in(self, msg):
         self.phrase = msg.data
+        if "Record" in self.state:
+            self._data.arm(self.phrase)
 
     def _volume_in(self, msg):
         track, value = msg.data
         self._volumes[track] = minmax(value / 127)
+        self.mixer.update(self._volumes, self._pans, self.x)
 
     def _stop_in(self, _):
         self.stop()
@@ -118,6 +222,8 @@ class Recorder(Bridge, Stream):
     def _xfade_in(self, msg):
         track, value = msg.data[1:]
         self._pans[track] = minmax(value / 127)
+        self.mixer.update(self._volumes, self._pans, self.x)
 
     def _xfader_in(self, msg):
         self.x = minmax(msg.data[0] / 127)
+        self.mixer.update(self._volumes, self._pans, self.x)
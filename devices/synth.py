@@ -1,12 +1,14 @@
 from typing import Union
 from midi import MidiDevice, SysexCmd, SysexReq
 from instruments import Instruments
+from instruments.cache import PatchCache
 from instruments.messages import InternalMessage as Msg, MacroMessage
 from utils import clip, scroll, split_hex, to_observable
 
 
 class SY1000(MidiDevice):
     instruments = Instruments(10, 21, 32, 43)
+    cache = PatchCache()
     patch = 0
 
     @property
@@ -67,17 +69,38 @@ class SY1000(MidiDevice):
         data = [*split_hex(200 - value), *split_hex(value)] * 2
         yield SysexCmd("inout", [0, 44, *data])
 
+    def send(self, msg):
+        data = getattr(msg, "data", [])
+        if msg.type == "sysex" and len(data) > 9 and data[6] == 18 and data[7] == 16:
+            self.cache.discard(self.patch, data[9])  # param changed from here
+        super().send(msg)
+
+    def _patch_state(self):
+        """Cached state of the patch at once, then its instr types to confirm it"""
+        state = self.cache.get(self.patch)
+        if state is not None:
+            for instr, typx in state["types"].items():
+                self.instruments.set(instr, typx)
+            for (instr, address), data in state["replies"].items():
+                yield from self.instruments.receive(instr, address, data)
+        yield from self.instruments.request
+
     def _sysex_in(self, msg: Union[SysexCmd, Msg]):
         if msg.data[0] != 65 or msg.data[6] != 18:
             return
         data = list(msg.data[7:])
         if data[1] == 1:  # "common" message
+            patches = self.cache.snapshot()  # written by a worker, off this loop
+            self.topology.pool.schedule(lambda *_: self.cache.save(patches=patches))
             self.patch = int("0x" + "".join(map(lambda a: hex(a)[2:], data[4:-1])), 16)
-            yield from self.instruments.request
+            yield from self._patch_state()
         elif data[0] == 16:  # "patch" message
             instr = data[2]
             if data[3] == 1:  # instr type
+                cached = self.cache.store_type(self.patch, instr, data[4])
                 self.instruments.set(instr, data[4])
-                yield from self.instruments.get(instr).request
+                if not cached:
+                    yield from self.instruments.get(instr).bulk_request
             elif instr in range(21, 55):  # instr params
-                yield from self.instruments.get(instr).receive(data[3], data[4:-1])
+                self.cache.store(self.patch, instr, data[3], data[4:-1])
+                yield from self.instruments.receive(instr, data[3], data[4:-1])
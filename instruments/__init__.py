@@ -1,6 +1,8 @@
+from bisect import bisect_left
 from typing import List, Union
 from midi.messages import SysexReq
-from .params import Pot, Pad, Bipolar, LFO, Switch, String
+from .params import Param, Pot, Pad, Bipolar, LFO, Switch, String
+from .planner import merge_ranges
 from .sequencer import Sequencer, Grid, Bar
 
 
@@ -12,6 +14,21 @@ class Instrument:
 
     def __init__(self, instr: int):
         self._instr = instr
+        sizes: dict[int, int] = {}
+        for param in self.params:
+            for request in param.request:
+                start = self._linear(param, param.address)
+                sizes[start] = max(sizes.get(start, 0), request[-1])
+        self.reads = merge_ranges(sizes.items())
+        # (param, linear origin, size of the data it decodes), by origin
+        self.spans = sorted(
+            [
+                (p, o, sizes.get(o, 1 - min(0, p.offset)))
+                for p, o in [(p, self._linear(p, p.origin)) for p in self.params]
+            ],
+            key=lambda span: span[1],
+        )
+        self.origins = [origin for _, origin, _ in self.spans]
 
     @property
     def instr(self):
@@ -25,6 +42,10 @@ class Instrument:
     def idx(self):
         return divmod(self._instr - 10, 11)[0]
 
+    def _linear(self, param: Param, address: int):
+        instr = self._instr if param.name == "strings" else self.instr
+        return instr * 128 + address
+
     @property
     def request(self):
         for param in self.params:
@@ -34,12 +55,23 @@ class Instrument:
                 else:
                     yield SysexReq("patch", [self.instr, *request])
 
-
-    def receive(self, address: int, data: "list[int]"):
-        """Called with the SY100 answer to an instr request"""
-        for param in self.params:
-            if param.origin == address:
-                yield from param.to_internal(self.idx, data)
+    @property
+    def bulk_request(self):
+        """Param requests merged into the fewest reads"""
+        for start, size in self.reads:
+            yield SysexReq("patch", [*divmod(start, 128), 0, 0, 0, size])
+
+    def dispatch(self, instr: int, address: int, data: "list[int]"):
+        """Splits the SY1000 answer to a read between the params it covers"""
+        start = instr * 128 + address
+        end = start + len(data)
+        for idx in range(bisect_left(self.origins, start), len(self.spans)):
+            param, origin, size = self.spans[idx]
+            if origin >= end:
+                break
+            if origin + size <= end:
+                values = data[origin - start : origin - start + size]
+                yield from param.to_internal(self.idx, values)
 
     def send(self, msg):
         """Called when the APC40 sends a command to this SY1000 instrument"""
@@ -170,6 +202,12 @@ class Instruments(List[Instrument]):
 
     def __init__(self, *args: int):
         super().__init__([Instrument(arg) for arg in args])
+        self.addresses: dict[int, Instrument] = {}
+        self._reindex()
+
+    def _reindex(self):
+        """Maps every address byte of the instruments to its instrument"""
+        self.addresses = {addr: instr for instr in self for addr in instr.range}
 
     @property
     def request(self):
@@ -180,11 +218,14 @@ class Instruments(List[Instrument]):
     def get(self, idx: int):
         if idx < len(self):
             return self[idx]
-        for instr in self:
-            if idx in instr.range:
-                return instr
+        if idx in self.addresses:
+            return self.addresses[idx]
         raise Exception("No instrument with idx %i", idx)
 
+    def receive(self, instr: int, address: int, data: "list[int]"):
+        """Decodes the SY1000 answer to a param request"""
+        return self.get(instr).dispatch(instr, address, data)
+
     def set(self, idx: int, typx: int):
         if typx not in range(0, 8):
             return
@@ -202,4 +243,5 @@ class Instruments(List[Instrument]):
 
     def _set(self, idx: int, synth: Instrument):
         self[idx] = synth
+        self._reindex()
 
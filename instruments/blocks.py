@@ -1,4 +1,6 @@
+from copy import copy
 from typing import Optional, Union
+from numpy import arange, flatnonzero, indices, ndarray, repeat, zeros, uint8
 from midi.messages import MidiCC, MidiNote
 from .messages import InternalMessage, MacroMessage, StringMessage
 from utils import scroll, clip
@@ -8,7 +10,8 @@ class Block:
     row_idx = 0
     col_idx = 0
     parent: Optional["Block"] = None
-    values: list[list[int]] = []
+    pinned: "dict[int, int]" = {}  # Nav macro -> page, for views on other pages
+    grid: ndarray  # values on every page of the Navs above, outermost first
 
     def __init__(self, name: str, macro: int, shape: Union[int, tuple[int, ...]] = 1):
         self.name = name
@@ -17,7 +20,38 @@ class Block:
             shape = tuple([shape, 1])
         self.row_size, self.col_size = shape[0], min(8, shape[1])
         self.max_col_page = divmod(shape[1] - 1, 8)[0]
-        self.values = [[0 for _ in range(0, shape[1])] for _ in range(0, shape[0])]
+        self.grid = zeros(shape[0:2], dtype=uint8)
+
+    @property
+    def values(self) -> ndarray:
+        """The block values on its page, a view of the grid"""
+        return self.grid[self.page]
+
+    @property
+    def page(self):
+        """Index of the page of every Nav above, outermost first"""
+        navs: list[Nav] = []
+        parent = self.parent
+        while parent is not None:
+            if isinstance(parent, Nav):
+                navs.insert(0, parent)
+            parent = parent.parent
+        page: tuple[int, ...] = ()
+        for nav in navs:
+            page += (self.pinned.get(nav.macro, int(nav.rows[page])),)
+        return page
+
+    def at(self, pinned: "dict[int, int]"):
+        """A view of the block with some Navs pinned to a page, sharing its grid"""
+        if not pinned:
+            return self
+        view = copy(self)
+        view.pinned = pinned
+        return view
+
+    def expand(self, pages: int):
+        """Adds a leading page axis to the grid, for a new Nav above"""
+        self.grid = repeat(self.grid[None], pages, axis=0)
 
     @property
     def address(self):
@@ -55,9 +89,11 @@ class Block:
         """Output the block MIDI messages for the current page"""
         MidiMessage = MidiNote if self.macro < 128 else MidiCC
         macro = self.macro if self.macro < 128 else self.macro - 128
-        for note, values in enumerate(self.values, macro):
-            for ch, val in enumerate(values[self.cursor : self.cursor + self.col_size]):
-                yield MidiMessage(ch, note, val)
+        page = self.values[:, self.cursor : self.cursor + self.col_size]
+        notes, channels = indices(page.shape).reshape(2, -1)
+        cells = zip(channels.tolist(), (notes + macro).tolist(), page.ravel().tolist())
+        for ch, note, val in cells:
+            yield MidiMessage(ch, note, val)
 
     @current.setter
     def current(self, args: tuple[int, ...]):
@@ -73,7 +109,7 @@ class Block:
         if len(args) < 2:
             args = args[0], 0
         note, ch = args[0:2]
-        return self.values[note - self.macro][ch + self.cursor]
+        return int(self.values[note - self.macro, ch + self.cursor])
 
     def update_value(self, *args: int):
         """Update the block values (value=None toggles 0~127)"""
@@ -91,6 +127,16 @@ class Block:
         if macro in self.range:
             return self
 
+    def fill(self, grid: ndarray):
+        """Sets all the block values at once"""
+        rows, cols = grid.shape
+        self.values[:rows, :cols] = grid
+
+    @property
+    def routes(self) -> "dict[int, Block]":
+        """Blocks by macro, as found by `get` with a single macro"""
+        return {macro: self for macro in self.range}
+
     def set(self, macro: int, *args: int):
         block = self.get(macro)
         if block:
@@ -120,10 +166,8 @@ class Stack(Block):
         if len(args) < 2:
             args = self.macro, args[0]
         row = args[0] - self.macro
-        for i, val in enumerate(self.values[row]):
-            if val == 0:
-                return i
-        return len(self.values[row])
+        empty = flatnonzero(self.values[row] == 0)
+        return int(empty[0]) if len(empty) > 0 else len(self.values[row])
 
     def update_value(self, *args: int):
         if len(args) == 1:  # channel only, acts as value
@@ -131,8 +175,7 @@ class Stack(Block):
         if len(args) == 2:
             args = 0, *args
         row, col, value = args[0:3]
-        for i, _ in enumerate(self.values[row]):
-            self.values[row][i] = value * (i <= col)
+        self.values[row] = value * (arange(len(self.values[row])) <= col)
 
 
 class CCBlock(Block):
@@ -143,7 +186,7 @@ class CCBlock(Block):
         root_page = self.root.row_idx
         if len(args) < 2:
             args = args[0], 0
-        control, ch = args
+        control, ch = args[0:2]
         value = args[2] if len(args) > 2 else self.value_at(control, ch)
         if root_page == 0:
             yield InternalMessage("xfade", control - self.macro, value)
@@ -154,12 +197,13 @@ class CCBlock(Block):
 class StringBlock(CCBlock):
     def __init__(self, macro: int, shape):
         super().__init__("strings", macro, shape)
+        self.max_col_page = 0  # the master channel 8 is an extra column, not a page
 
     def set(self, page: int, macro: int, *args: int):
         for channel, value in enumerate(args):
-            self.update_value(macro, channel, value)
+            self.update_value(macro - self.macro, channel, value)
             if channel == page:
-                yield MidiCC(channel, macro, value)
+                yield MidiCC(channel, macro - 128, value)
 
     def message(self, *args: int):
         if len(args) < 2:
@@ -194,6 +238,8 @@ class Pager(Block):
         self.prev_macro, self.next_macro = macros
         super().__init__("_", self.next_macro, 1)
         self.children = [*children]
+        for child in children:
+            child.parent = self
 
     @property
     def range(self):
@@ -213,10 +259,23 @@ class Pager(Block):
             if block:
                 return block
 
+    @property
+    def routes(self):
+        routes = super().routes
+        for child in self.children:
+            for macro, block in child.routes.items():
+                routes.setdefault(macro, block)
+        return routes
+
+    def expand(self, pages: int):
+        super().expand(pages)
+        for child in self.children:
+            child.expand(pages)
+
     @property
     def current(self):
         for block in self.children:
-            yield from block.current
+            yield from block.at(self.pinned).current
 
     @current.setter
     def current(self, note: int, *_):
@@ -234,58 +293,72 @@ class Pager(Block):
 
 
 class Nav(Block):
-    children: list[list[Block]] = []
+    children: list[Block] = []
 
     def __init__(self, name: str, macro: int, shape: int, *children: Block):
         super().__init__(name, macro, (shape, 1))
         self.max_row_page = shape - 1
-        self.children = [[] * len(children)] * self.row_size
+        self.rows = zeros((), dtype=int)  # the row index on every page above
+        # one subtree for all pages, its grids get a page axis for this nav
+        self.children = [*children]
+        for child in children:
+            child.parent = self
+            child.expand(shape)
+        self.reroute()
 
-        for i in range(0, self.row_size):
-            self.children[i] = [self.from_block(block) for block in children]
+    @property
+    def row_idx(self):
+        return int(self.rows[self.page])
+
+    @row_idx.setter
+    def row_idx(self, row: int):
+        self.rows[self.page] = row
+
+    def expand(self, pages: int):
+        super().expand(pages)
+        self.rows = repeat(self.rows[None], pages, axis=0)
+        for child in self.children:
+            child.expand(pages)
+
+    def reroute(self):
+        """Flattens the block tree into a macro -> block table"""
+        self.table: dict[int, Block] = {macro: self for macro in self.range}
+        for child in self.children:
+            for macro, block in child.routes.items():
+                self.table.setdefault(macro, block)
+
+    @property
+    def routes(self):
+        return dict(self.table)
 
     @Block.current.getter
     def current(self):
         yield from super(Nav, self).current
-        for block in self.children[self.row_idx]:
-            yield from block.current
-
-    def from_block(self, block: "Union[Block, Pager, Nav, CCBlock]"):
-        if isinstance(block, Nav):
-            shape = len(block.children)
-            fresh = Nav(block.name, block.macro, shape, *block.children[0])
-        elif isinstance(block, Pager):
-            macros = block.next_macro, block.prev_macro
-            fresh = Pager(macros, *block.children)
-        elif isinstance(block, CCBlock):
-            shape = len(block.values), len(block.values[0])
-            fresh = CCBlock(block.name, block.macro - 128, shape)
-        else:
-            shape = len(block.values), len(block.values[0])
-            fresh = Block(block.name, block.macro, shape)
-        fresh.parent = self
-        return fresh
+        for block in self.children:
+            yield from block.at(self.pinned).current
 
     def update_value(self, *args: int):
         if len(args) < 3:
             args = args[0], 0, args[1]
         super().update_value(*args)
         row, col = args[0:2]
-        if self.values[row][col] > 0:
-            for i, cols in enumerate(self.values):
-                self.values[i][col] = cols[col] * (i == row)
+        if self.values[row, col] > 0:  # only one row selected per column
+            column = self.values[:, col]
+            value = column[row]
+            column[:] = 0
+            column[row] = value
 
     def get(self, *args: int):
-        """Get a block by its index, looking through children too"""
-        if len(args) == 1:
-            args = 0, args[0]
-        page, macro = args[0:2]
+        """Get a block by its index, on the current page or on the given one"""
+        macro = args[-1]
         if macro in self.range:
             return self
-        for child in self.children[page]:
-            block = child.get(macro)
-            if block:
-                return block
+        block = self.table.get(macro)
+        if block is None:
+            return None
+        if len(args) == 1:
+            return block.at(self.pinned)
+        return block.at({**self.pinned, self.macro: args[0]})
 
     def set(self, *args: int):
         if len(args) == 2:
@@ -297,6 +370,14 @@ class Nav(Block):
             if page == self.row_idx:
                 yield from block.current
 
+    def set_grid(self, page: int, macro: int, grid: ndarray):
+        """Fills a child block, returns its display if the page is current"""
+        block = self.get(page, macro)
+        if block is None:
+            return []
+        block.fill(grid)
+        return block.current if page == self.row_idx else []
+
     def message(self, *args: int):
         if not self.empty(*args):
             row_idx = args[0] - self.macro
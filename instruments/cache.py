@@ -0,0 +1,124 @@
+import os
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+
+class PatchCache:
+    """Decoded states of the last visited SY-1000 patches (LRU).
+
+    A patch state is the type of each instrument and the raw answers to its
+    param requests, so a revisited patch is replayed through
+    `Instruments.receive` at once. With `trust`, the params of an instrument
+    whose type didn't change are not requested again: edits made on the
+    SY-1000 itself are then only seen once the patch leaves the cache.
+    Params changed from here are discarded by the thread sending them, so
+    the states are only read and changed under the lock.
+    """
+
+    def __init__(self, size=32, file: Optional[str] = None, trust=False):
+        self.size = size
+        self.file = file
+        self.trust = trust
+        self._patches: "OrderedDict[int, dict]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._saving = threading.Lock()  # one file write at a time
+        if file is not None and os.path.exists(file):
+            self.load(file)
+
+    def __len__(self):
+        return len(self._patches)
+
+    def __contains__(self, patch: int):
+        return patch in self._patches
+
+    def get(self, patch: int):
+        """A copy of the state of a patch (types, replies), None if not cached"""
+        with self._lock:
+            state = self._get(patch)
+            if state is None:
+                return None
+            return {"types": dict(state["types"]), "replies": dict(state["replies"])}
+
+    def _get(self, patch: int) -> Optional[dict]:
+        if patch not in self._patches:
+            return None
+        self._patches.move_to_end(patch)
+        return self._patches[patch]
+
+    def _state(self, patch: int):
+        state = self._get(patch)
+        if state is None:
+            state = self._patches[patch] = {"types": {}, "replies": {}}
+            while len(self._patches) > self.size:
+                self._patches.popitem(last=False)
+        return state
+
+    def store_type(self, patch: int, instr: int, typx: int):
+        """Records an instr type, True if the cached params are trusted as is"""
+        with self._lock:
+            state = self._state(patch)
+            previous = state["types"].get(instr)
+            if previous == typx:
+                instrs = range(instr, instr + 11)
+                return self.trust and any(i in instrs for i, _ in state["replies"])
+            self.discard(patch, instr)
+            state["types"][instr] = typx
+            return False
+
+    def store(self, patch: int, instr: int, address: int, data: "list[int]"):
+        """Records the answer to a param request"""
+        with self._lock:
+            self._state(patch)["replies"][(instr, address)] = list(data)
+
+    def discard(self, patch: int, instr: int):
+        """Forgets an instrument of a patch (ex: a param was changed)"""
+        with self._lock:
+            state = self._patches.get(patch)
+            if state is None:
+                return
+            for typ_instr in list(state["types"]):
+                if instr in range(typ_instr, typ_instr + 11):
+                    del state["types"][typ_instr]
+                    instr = typ_instr
+            instrs = range(instr, instr + 11)
+            for key in [k for k in state["replies"] if k[0] in instrs]:
+                del state["replies"][key]
+
+    def snapshot(self):
+        """The patches as saved, to write them from another thread"""
+        with self._lock:
+            return [
+                {
+                    "patch": patch,
+                    "types": list(state["types"].items()),
+                    "replies": [[*key, data] for key, data in state["replies"].items()],
+                }
+                for patch, state in self._patches.items()
+            ]
+
+    def save(self, file: Optional[str] = None, patches: Optional[list] = None):
+        file = file or self.file
+        if file is None:
+            return
+        if patches is None:
+            patches = self.snapshot()
+        with self._saving:
+            with open(file + ".tmp", "w") as f:
+                json.dump(patches, f)
+            os.replace(file + ".tmp", file)
+
+    def load(self, file: str):
+        try:
+            with open(file) as f:
+                patches = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning("[MID] Patch cache %s not loaded: %s", file, e)
+            return
+        for entry in patches[-self.size :]:
+            self._patches[entry["patch"]] = {
+                "types": {instr: typx for instr, typx in entry["types"]},
+                "replies": {(i, a): data for i, a, data in entry["replies"]},
+            }
@@ -1,3 +1,7 @@
+from typing import Optional
+from numpy import asarray, ndarray, uint8
+
+
 class InternalMessage(object):
     def __init__(self, type: str, *args):
         super(InternalMessage, self).__init__()
@@ -32,9 +36,23 @@ class MacroMessage(InternalMessage):
 
 
 class StepMessage(MacroMessage):
-    def __init__(self, *args):
+    def __init__(self, *args, grid: Optional[ndarray] = None):
         super().__init__("steps", *args)
-        self.steps: list[list[int]] = list(args[3:])
+        if grid is None:  # steps as lists of pad values
+            grid = asarray(list(args[3:]), dtype=uint8).T
+        self._grid = grid
+
+    @property
+    def grid(self) -> ndarray:
+        """Steps as a (pads, steps) array"""
+        return asarray(self._grid, dtype=uint8)  # a list once read from a trace
+
+    @property
+    def steps(self) -> "list[list[int]]":
+        return self.grid.T.tolist()
+
+    def dict(self):
+        return [*self.data[0:3], *self.steps]
 
 
 class StringMessage(MacroMessage):
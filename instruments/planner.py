@@ -0,0 +1,18 @@
+from typing import Iterable
+
+MAX_REQUEST_SIZE = 127  # RQ1 size on the last 7-bit byte only
+
+
+def merge_ranges(ranges: "Iterable[tuple[int, int]]", size=MAX_REQUEST_SIZE):
+    """Fewest (start, size) reads covering all the (start, size) ranges.
+
+    Overlapping, adjacent and close ranges are read at once, as long as the
+    read stays within `size` bytes (a larger range is still read alone).
+    """
+    merged: "list[list[int]]" = []
+    for start, length in sorted(ranges):
+        if merged and start + length - merged[-1][0] <= size:
+            merged[-1][1] = max(merged[-1][1], start + length - merged[-1][0])
+        else:
+            merged.append([start, length])
+    return [(start, length) for start, length in merged]
@@ -1,3 +1,4 @@
+from numpy import asarray, clip as clip_array, ndarray, rint, uint8
 from midi.messages import SysexCmd
 from .params import Pad
 from .messages import InternalMessage, MacroMessage, StepMessage
@@ -27,6 +28,12 @@ class Grid(Pad):
         vel = super().to_vel(val)
         return [127 * (vel >= v) for v in self.values]
 
+    def to_grid(self, steps: ndarray):
+        """Velocities of all the steps at once, one row per pad"""
+        span = self.max_value - self.min_value
+        vel = rint(clip_array((steps - self.min_value) / span * 128, 0, 127))
+        return (vel >= asarray(self.values)[:, None]).astype(uint8) * 127
+
 
 class Bar(Pad):
     name = "seq"
@@ -61,14 +68,11 @@ class Sequencer(Pad):
 
     def to_internal(self, idx: int, data: "list[int]"):
         params, all_steps = data[0:3], data[3:99]
+        # 16 (min, max) pairs per param, the step value is the max
+        values = asarray(all_steps).reshape((len(self.params), -1, 2))[:, :, 1]
         for i, param in enumerate(self.params):
-            values = all_steps[i * 32 : (i + 1) * 32]
-            steps = [
-                param.to_vel(val)
-                for j, val in enumerate(values)
-                if divmod(j, 2)[1] == 1
-            ]
-            yield StepMessage(idx, self.macro, param.macro, *steps)
+            grid = param.to_grid(values[i])
+            yield StepMessage(idx, self.macro, param.macro, grid=grid)
             yield MacroMessage(param.name, idx, param.macro, params[i])
         for i, seq in enumerate(self.sequencers):
             # off=0 or length=1~16
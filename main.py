@@ -10,21 +10,56 @@ SYNTH_DEVICE_NAME = os.environ.get("SYNTH_DEVICE", "SY-1000 MIDI 1")
 CONTROL_DEVICE_NAME = os.environ.get("CONTROL_DEVICE", "Akai APC40 MIDI 1")
 AUDIO_DEVICE_NAME = os.environ.get("AUDIO_DEVICE", "SY-1000")
 MIDO_BACKEND = os.environ.get("__MIDO_BACKEND__", "mido.backends.portmidi")
-logging.basicConfig(
-    level=DEBUG,
-    format="%(asctime)s: %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-)
+MIDI_INPUT = os.environ.get("MIDI_INPUT", "event")
+MIDI_RATE = int(os.environ.get("MIDI_RATE", 3125))
+MIDI_WORKERS = int(os.environ.get("MIDI_WORKERS", 2))
+PHRASES_DIRECTORY = os.environ.get("PHRASES_DIRECTORY")
+TAKES_DIRECTORY = os.environ.get("TAKES_DIRECTORY")
+TAKES_SPLIT = bool(os.environ.get("TAKES_SPLIT"))
+PHRASES_FILE = os.environ.get("PHRASES_FILE")
+PATCHES_FILE = os.environ.get("PATCHES_FILE")
+PATCHES_TRUST = bool(os.environ.get("PATCHES_TRUST"))
+AUDIO_METRICS = os.environ.get("AUDIO_METRICS")
+METRICS_PORT = os.environ.get("METRICS_PORT")
+MIDI_TRACE = os.environ.get("MIDI_TRACE")
+NET_MODE = os.environ.get("NET_MODE", "poll")
+NET_PEERS = os.environ.get("NET_PEERS")
+from utils import log
 
+log.setup(DEBUG, format="%(asctime)s: %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
+
+from bridge import Bridge
+from midi import MidiDevice
 from devices import Recorder, Metronome, APC40, SY1000
+from midi.topology import Topology
+from midi.trace import TraceWriter
+from instruments.cache import PatchCache
 
 if __name__ == "__main__":
     try:
         mido.set_backend(MIDO_BACKEND, load=True)
         logging.info("[MID] Midi Backend started on %s", MIDO_BACKEND)
+        MidiDevice.input_mode = MIDI_INPUT
+        MidiDevice.rate = MIDI_RATE
+        MidiDevice.topology = Topology(workers=MIDI_WORKERS)
+        MidiDevice.net_mode = NET_MODE
+        MidiDevice.peers = NET_PEERS.split(",") if NET_PEERS else []
+        SY1000.cache = PatchCache(file=PATCHES_FILE, trust=PATCHES_TRUST)
+        if MIDI_TRACE:
+            Bridge.trace = TraceWriter(MIDI_TRACE)
         control = APC40(CONTROL_DEVICE_NAME, 8080)
         synth = SY1000(SYNTH_DEVICE_NAME, 8081)
-        audio = Recorder(AUDIO_DEVICE_NAME, 16, 8)
+        audio = Recorder(
+            AUDIO_DEVICE_NAME,
+            16,
+            8,
+            directory=PHRASES_DIRECTORY,
+            takes=TAKES_DIRECTORY,
+            split=TAKES_SPLIT,
+            file=PHRASES_FILE,
+            metrics=float(AUDIO_METRICS) if AUDIO_METRICS else None,
+            metrics_port=int(METRICS_PORT) if METRICS_PORT else None,
+        )
         Metronome(synth).start(control, synth, audio)
     except Exception as e:
         logging.exception(e)
@@ -0,0 +1,52 @@
+import time
+from typing import Optional
+import mido
+from audio.timeline import ClockTimeline
+
+CLOCK_TYPES = ["clock", "start", "continue", "stop"]
+SYSEX_ID = [0x7D, 0x4F, 0x43]  # non-commercial id, "OC"
+TEMPO_REQUEST = mido.Message("sysex", data=[*SYSEX_ID, 0x01])
+
+
+def is_tempo_request(msg: mido.Message):
+    """A client asks for tempo + position messages instead of the ticks"""
+    return msg.type == "sysex" and msg.data == TEMPO_REQUEST.data  # type: ignore
+
+
+def tempo_message(bpm: float, beat: int):
+    """Tempo (in centi-BPM) and position (in beats since the start), 12 bytes"""
+    data = [*SYSEX_ID, 0x02]
+    for value in [round(bpm * 100), beat]:
+        value = min(max(value, 0), 2**21 - 1)
+        data += [value >> 14 & 0x7F, value >> 7 & 0x7F, value & 0x7F]
+    return mido.Message("sysex", data=data)
+
+
+class ClockFanout:
+    """Forwards the clock to the network clients, from the thread reading it.
+
+    The clients get the start/stop/continue messages and every tick, or, if
+    they sent a TEMPO_REQUEST, one tempo message per beat instead of the ticks.
+    """
+
+    def __init__(self, server, timeline: Optional[ClockTimeline] = None):
+        self.server = server
+        if timeline is None:
+            timeline = ClockTimeline()
+        self.timeline = timeline  # shared with the metronome
+        self.ppqn = self.timeline.ppqn
+        self.ticks = 0
+
+    def send(self, msg: mido.Message):
+        if msg.type == "clock":
+            self.timeline.tick(time.monotonic())
+            beat, tick = divmod(self.ticks, self.ppqn)
+            self.ticks += 1
+            tempo: Optional[mido.Message] = None
+            if tick == 0:
+                tempo = tempo_message(self.timeline.bpm, beat)
+            self.server.send_clock(msg, tempo)
+        elif msg.type in CLOCK_TYPES:
+            if msg.type == "start":
+                self.ticks = 0
+            self.server.send_clock(msg, msg)
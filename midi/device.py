@@ -1,18 +1,33 @@
 import logging
 import mido
+from queue import Empty, SimpleQueue
 from reactivex.abc import ObserverBase
-from typing import Union
+from typing import Optional, Union
 
 from bridge import Bridge
-from midi.messages import MidiMessage, MidoMessage
-from midi.server import MidiServer
-from midi.scheduler import MidiScheduler
+from midi.clock import CLOCK_TYPES
+from midi.messages import MidoMessage
+from midi.output import MidiOutput, MIDI_WIRE_RATE
+from midi.reader import MidiReader
+from midi.server import MidiServer, NetBridge
+from midi.topology import Topology
 from instruments.messages import InternalMessage
-from utils import retry
+from utils import log, retry
 
 
 class MidiDevice(Bridge):
-    scheduler = MidiScheduler()
+    topology = Topology()
+    # "event": messages handled as they arrive, "poll": every 5ms, both read by
+    # the one reader of the port, so the devices sharing it all get theirs
+    input_mode = "event"
+    idle = 0.05  # network clients polling rate in "event" mode
+    rate = MIDI_WIRE_RATE  # output budget, in bytes per second
+    # "poll": network clients accepted and read by the input loop, "bridge": by a
+    # selector thread, which also connects to the peers hosts
+    net_mode = "poll"
+    peers: "list[str]" = []
+    _polled: "Optional[SimpleQueue[MidoMessage]]" = None
+    output: Optional[MidiOutput] = None
 
     def __init__(self, port: Union[str, "MidiDevice"], portno=None):
         self.channel = 0
@@ -20,62 +35,102 @@ class MidiDevice(Bridge):
             super(MidiDevice, self).__init__("[MID] " + port[0:-7])
             self.inport: mido.ports.BaseInput = retry(mido.open_input, [port])  # type: ignore
             self.outport: mido.ports.BaseOutput = retry(mido.open_output, [port])  # type: ignore
+            self.output = MidiOutput(self.outport, self.send_action, self.rate)
             if isinstance(portno, int):
-                self.server = MidiServer(portno)
+                if self.net_mode == "bridge":
+                    self.server = NetBridge(portno, self.peers)
+                else:
+                    self.server = MidiServer(portno)
             logging.info("%s connected", self.name)
         elif isinstance(port, MidiDevice):
             super(MidiDevice, self).__init__(port.name)
             self.inport = port.inport
             self.outport = port.outport
+            self.output = port.output
             self.server = port.server
 
     @property
     def is_closed(self):
         return self.inport.closed
 
+    @property
+    def reader(self):
+        return MidiReader.of(self.inport)
+
     @property
     def messages(self) -> list[MidoMessage]:
-        midi_in = [
-            m for m in self.inport.iter_pending() if m.type not in ["clock", "start"]
-        ]
+        """Messages of the port reader since the last poll (poll mode)"""
+        if self._polled is None:
+            self._polled = self.reader.subscribe(
+                lambda msg: msg.type not in ["clock", "start"]
+            )
+        midi_in = []
+        while not self._polled.empty():
+            msg = self._polled.get_nowait()
+            if msg is not None:  # the port closed, is_closed tells
+                midi_in.append(msg)
+        return self.thru(midi_in)
+
+    def pending(self, queue: "SimpleQueue[MidoMessage]"):
+        """Waits for the reader messages (event mode), None once the port closed"""
+        midi_in = []
+        try:
+            midi_in.append(queue.get(timeout=self.idle))
+            while not queue.empty():
+                midi_in.append(queue.get_nowait())
+        except Empty:
+            pass
+        if any(msg is None for msg in midi_in):  # messages can't be compared to None
+            return None
+        return self.thru(midi_in)
+
+    def thru(self, midi_in: list[MidoMessage]):
+        """Forwards the port messages to the network, adds the clients messages"""
         for msg in midi_in:
-            self.server.send(msg)
-        client_in = []
-        for port in self.server:
-            client_in += [m for m in port.iter_pending()]
+            if msg.type not in CLOCK_TYPES:  # the metronome fans the clock out
+                self.server.send(msg)
+        client_in = self.server.pending()
         return [m for m in [*midi_in, *client_in] if self.select_message(m)]
 
     def __del__(self):
         super().__del__()
+        if self.output is not None:
+            self.output.close()
         if self.inport is not None and not self.inport.closed:
             self.inport.close()
         if self.outport is not None and not self.outport.closed:
             self.outport.close()
 
-    def receive(self, observer: ObserverBase[MidoMessage], scheduler: MidiScheduler):
-        return scheduler.schedule_in(self, observer)
+    @property
+    def scheduler(self):
+        """Event loop of this device"""
+        return self.topology.io(self.name)
+
+    def receive(self, observer: ObserverBase[MidoMessage], _=None):
+        return self.scheduler.schedule_in(self, observer)
 
     def send(self, msg):
         try:
+            self.record("out", msg)
             if isinstance(msg, InternalMessage):
                 self.on_next(msg)
-                debug_infos = [self.name, msg.type.capitalize(), msg.dict()]
-                logging.debug("%s %s message THRU: %s", *debug_infos)
-            elif isinstance(msg, MidiMessage):
-                MidiDevice.scheduler.schedule_out(self.send_action, msg)
+                if log.enabled:
+                    log.message(self.name, "THRU", msg)
+            elif isinstance(msg, mido.Message):
+                # a full output drops the beat feedback, instead of delaying it
+                self.output.put(msg, wait=not self.topology.on_clock)
             else:
                 super().send(msg)
         except Exception as e:
             logging.error("%s error OUT", self.name)
             logging.exception(e)
 
-    def send_action(self, _, msg):
+    def send_action(self, msg):
         if msg is not None:
             self.outport.send(msg)
-            debug_infos = [self.name, msg.type.capitalize(), msg.dict()]
-            logging.debug("%s %s message OUT: %s", *debug_infos)
+            if log.enabled:
+                log.message(self.name, "OUT", msg)
 
     def debug(self, msg):
-        if msg is not None:
-            debug_infos = [self.name, msg.type.capitalize(), msg.dict()]
-            logging.debug("%s %s message IN: %s", *debug_infos)
+        if msg is not None and log.enabled:
+            log.message(self.name, "IN", msg)
@@ -0,0 +1,81 @@
+import threading
+from typing import Optional
+import mido
+
+
+def cell_of(msg: mido.Message) -> "Optional[tuple[str, int, int]]":
+    if msg.type in ["note_on", "note_off"]:
+        return "note", msg.channel, msg.note  # type: ignore
+    if msg.type == "control_change":
+        return "cc", msg.channel, msg.control  # type: ignore
+    return None
+
+
+def value_of(msg: mido.Message) -> int:
+    if msg.type == "note_on":
+        return msg.velocity  # type: ignore
+    if msg.type == "control_change":
+        return msg.value  # type: ignore
+    return 0
+
+
+FLUSH = object()  # sent after a message to show it now, not on the next refresh
+
+
+class Frame:
+    """Frame buffer of a control surface LEDs and knob rings.
+
+    Keeps the last value shown by each (channel, note/cc) cell: a refresh
+    only outputs the cells that changed since, last value first. Cells are
+    put from several threads, `request` tells which one schedules the refresh.
+    """
+
+    def __init__(self):
+        self.shown: dict[tuple[str, int, int], int] = {}
+        self._pending: dict[tuple[str, int, int], mido.Message] = {}
+        self._requested = False
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def put(self, msg: mido.Message):
+        """Draws a message on the next refresh, False if it isn't a cell"""
+        cell = cell_of(msg)
+        if cell is None:
+            return False
+        with self._lock:
+            self._pending.pop(cell, None)
+            self._pending[cell] = msg
+        return True
+
+    def seen(self, msg: mido.Message):
+        """The surface shows this value by itself (ex: a knob ring turned)"""
+        cell = cell_of(msg)
+        if cell is not None:
+            with self._lock:
+                self.shown[cell] = value_of(msg)
+
+    def request(self):
+        """True for the first request since the last refresh, which schedules it"""
+        with self._lock:
+            requested, self._requested = self._requested, True
+        return not requested
+
+    def refresh(self):
+        """Messages of the cells that changed since the last refresh"""
+        with self._lock:
+            self._requested = False
+            pending, self._pending = self._pending, {}
+            changes = []
+            for cell, msg in pending.items():
+                value = value_of(msg)
+                if self.shown.get(cell) != value:
+                    self.shown[cell] = value
+                    changes.append(msg)
+        return changes
+
+    def clear(self):
+        """Forgets what the surface shows, to redraw it all"""
+        with self._lock:
+            self.shown.clear()
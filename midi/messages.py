@@ -1,6 +1,6 @@
 import mido
-from contextlib import contextmanager
-from utils import checksum
+from collections import deque
+from midi.sysex import SysexEncoder, SYSEX_CMD, SYSEX_REQ
 
 
 class TrackSelection(Exception):
@@ -14,6 +14,8 @@ class TrackSelection(Exception):
     @classmethod
     def check(cls, iterable: list[mido.messages.Message]):
         """Target the message list of CC sent on track selection"""
+        if len(iterable) == 0:
+            return False
         item, *rest = iterable
         return (
             item is not None
@@ -29,13 +31,19 @@ class TrackSelection(Exception):
         )
 
 
+def coalesce_key(msg: mido.messages.Message):
+    """Messages with the same key supersede each other, None never does"""
+    if msg.type == "control_change":
+        return msg.type, msg.channel, msg.control  # type: ignore
+    if msg.type == "sysex":
+        data = msg.data  # type: ignore
+        return msg.type, data[6:7], tuple(data[7:11]), len(data)  # RQ1/DT1, address
+    return None
+
+
 class MidoMessage(mido.messages.Message):
     type: str
 
-    @property
-    def is_after(self):
-        return lambda _: False
-
     def bytes(self):
         return super().bytes()
 
@@ -46,56 +54,54 @@ class MidoMessage(mido.messages.Message):
         return True
 
 
-class MessageQueue(list[MidoMessage]):
+class MessageQueue:
+    """Last value wins for CC/sysex, popped first (LIFO), then notes (FIFO).
+
+    CC/sysex are keyed by address, so a newer message replaces the pending
+    one in constant time. Iterating pops the queue until it is empty.
+    """
+
     def __init__(self, iterable=None, types=["control_change", "sysex"]):
-        super().__init__()
         self.types = types
+        self._latest: dict[tuple, MidoMessage] = {}  # insertion ordered
+        self._events: deque[MidoMessage] = deque()
         if isinstance(iterable, list):
             if TrackSelection.check(iterable):
                 raise TrackSelection(iterable[0])
             for el in iterable:
                 self.add(el)
 
-    def __enter__(self):
+    def __len__(self):
+        return len(self._latest) + len(self._events)
+
+    def __iter__(self):
         while len(self) > 0:
             yield self.pop()
 
+    def __enter__(self):
+        return self
+
     def __exit__(self, type, value, tr):
         return True
 
     def pop(self):
-        msg = super().pop()
-        if msg.type in self.types:
-            for el in self:
-                if msg.is_after(el):
-                    self.remove(el)
-        return msg
+        if len(self._latest) > 0:
+            return self._latest.popitem()[1]
+        return self._events.popleft()
 
     def add(self, msg):
         if msg.type in self.types:
             # the last cc/sysex must be at the top of the queue (LIFO)
-            super().append(msg)
+            key = coalesce_key(msg) or (id(msg),)
+            self._latest.pop(key, None)
+            self._latest[key] = msg
         else:
             # otherwise keep the original order of events when dequeuing (FIFO)
-            self.insert(0, msg)
+            self._events.append(msg)
 
 
 class MidiMessage(MidoMessage):
-    _out_q: MessageQueue = MessageQueue()
-
-    def __init__(self, type, *args, **kwargs):
-        super().__init__(type, *args, **kwargs)
-        MidiMessage._out_q.add(self)
-
-    @classmethod
-    @contextmanager
-    def from_mido(cls, messages: list[MidoMessage]):
-        yield from MessageQueue(messages)
-
-    @classmethod
-    @contextmanager
-    def to_mido(cls):
-        yield from MidiMessage._out_q
+    pass
 
 
 class MidiNote(MidoMessage):
@@ -123,16 +129,6 @@ class MidiCC(MidiMessage):
             "control_change", channel=channel, control=control, value=value
         )
 
-    @property
-    def is_after(self):
-        def wrapped(msg):
-            return (
-                msg.type == "control_change"
-                and self.channel == msg.channel
-                and self.control == msg.control
-            )
-
-        return wrapped
 
 
 class Sysex(MidiMessage):
@@ -141,17 +137,6 @@ class Sysex(MidiMessage):
     def __init__(self, *args: int, **kwargs):
         super(Sysex, self).__init__("sysex", *args, **kwargs)
 
-    @property
-    def is_after(self):
-        def wrapped(msg):
-            return (
-                msg.type == "sysex"
-                and self.address == msg.address
-                and len(self.body) == len(msg.body)
-            )
-
-        return wrapped
-
     @property
     def address(self):
         return self.data[7:11]
@@ -165,23 +150,17 @@ class Sysex(MidiMessage):
         return self.data[-1]
 
 
-SYNTH_SYSEX_HEAD = [65, 0, 0, 0, 0, 105]
-SYNTH_SYSEX_REQ = [*SYNTH_SYSEX_HEAD, 17]
-SYNTH_SYSEX_CMD = [*SYNTH_SYSEX_HEAD, 18]
-SYNTH_ADDRESSES = {"common": [0, 1], "patch": [16, 0], "inout": [0, 4]}
-
+class SynthSysex(Sysex):
+    encoders: "dict[str, SysexEncoder]" = {}
 
-class SysexCmd(Sysex):
     def __init__(self, addr: str, data: list[int], *args, **kwargs):
-        head = SYNTH_ADDRESSES[addr]
-        super(SysexCmd, self).__init__(
-            data=[*SYNTH_SYSEX_CMD, *checksum(head, data)], *args, **kwargs
-        )
+        encoded = self.encoders[addr].encode(data)
+        super(SynthSysex, self).__init__(data=encoded, *args, **kwargs)
 
 
-class SysexReq(Sysex):
-    def __init__(self, addr: str, data: list[int], *args, **kwargs):
-        head = SYNTH_ADDRESSES[addr]
-        super(SysexReq, self).__init__(
-            data=[*SYNTH_SYSEX_REQ, *checksum(head, data)], *args, **kwargs
-        )
+class SysexCmd(SynthSysex):
+    encoders = SYSEX_CMD
+
+
+class SysexReq(SynthSysex):
+    encoders = SYSEX_REQ
@@ -0,0 +1,121 @@
+import time
+import heapq
+import logging
+import threading
+from itertools import count
+from typing import Callable, Optional
+import mido
+from midi.messages import coalesce_key
+
+# 31.25 kbaud, 10 bits per byte on the wire (start + 8 bits + stop)
+MIDI_WIRE_RATE = 3125
+
+
+def priority_of(msg: mido.Message):
+    """Sysex (parameter writes) first, then CC, then notes (LED feedback)"""
+    if msg.type == "sysex":
+        return 0
+    if msg.type == "control_change":
+        return 1
+    return 2
+
+
+class MidiOutput(threading.Thread):
+    """Paced output of one port, keyed by (priority, deadline).
+
+    A CC or sysex to an address that is still pending replaces the pending
+    message in place (last value wins, first slot kept). When the heap is
+    full, `put` waits for the port to catch up, unless told not to (the clock
+    thread): the message is then dropped and counted. Once closed, or once
+    the port is, the thread exits and `put` drops the messages.
+    """
+
+    def __init__(
+        self,
+        port: mido.ports.BaseOutput,
+        send: Optional[Callable[[mido.Message], None]] = None,
+        rate=MIDI_WIRE_RATE,
+        size=1024,
+    ):
+        super().__init__(name="[MID] Output " + str(port.name), daemon=True)
+        self.port = port
+        self.rate = rate
+        self.size = size
+        self._send = send or port.send
+        self._heap: list[list] = []
+        self._pending: dict[tuple, list] = {}
+        self._ids = count()
+        self._free = 0.0  # when the wire is available again
+        self._cond = threading.Condition()
+        self.closed = False
+        self.dropped = 0
+        self.start()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def close(self):
+        """Stops the thread, the pending messages are not sent"""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def put(
+        self, msg: mido.Message, priority: Optional[int] = None, delay=0.0, wait=True
+    ):
+        key = coalesce_key(msg)
+        with self._cond:
+            if key is not None and key in self._pending:
+                self._pending[key][3] = msg
+                return
+            while wait and len(self._heap) >= self.size and not self.closed:
+                self._cond.wait()
+            if self.closed or len(self._heap) >= self.size:
+                self.dropped += not self.closed
+                return
+            if priority is None:
+                priority = priority_of(msg)
+            entry = [priority, time.monotonic() + delay, next(self._ids), msg, key]
+            heapq.heappush(self._heap, entry)
+            if key is not None:
+                self._pending[key] = entry
+            self._cond.notify_all()
+
+    def _get(self):
+        with self._cond:
+            while True:
+                if self.closed:
+                    return None
+                if len(self._heap) == 0:
+                    self._cond.wait()
+                    continue
+                wait = self._heap[0][1] - time.monotonic()
+                if wait <= 0:
+                    break
+                self._cond.wait(wait)
+            _, _, _, msg, key = heapq.heappop(self._heap)
+            if key is not None:
+                del self._pending[key]
+            self._cond.notify_all()
+            return msg
+
+    def run(self):
+        try:
+            self._run()
+        finally:
+            self.close()
+
+    def _run(self):
+        while not self.port.closed:
+            msg = self._get()
+            if msg is None:
+                break
+            wait = self._free - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                self._send(msg)
+            except Exception as e:
+                logging.exception(e)
+            start = max(self._free, time.monotonic())
+            self._free = start + len(msg.bin()) / self.rate
@@ -0,0 +1,90 @@
+import logging
+import threading
+from queue import SimpleQueue
+from typing import Callable, Optional
+import mido
+
+# (select, callback, queue): a callback is run before its queue is fed
+Subscriber = tuple[Callable, Optional[Callable], Optional[SimpleQueue]]
+
+
+class MidiReader(threading.Thread):
+    """Blocking reader of one input port, fanning its messages out to queues.
+
+    A port has a single reader, shared by every device wrapping that port,
+    so each message is handled as soon as it arrives, and only once.
+    """
+
+    _readers: "dict[int, MidiReader]" = {}
+    _lock = threading.Lock()
+
+    def __init__(self, port: mido.ports.BaseInput):
+        super().__init__(name="[MID] Reader " + str(port.name), daemon=True)
+        self.port = port
+        self._subs: "list[Subscriber]" = []
+        self._running = False
+
+    @classmethod
+    def of(cls, port: mido.ports.BaseInput):
+        with cls._lock:
+            if id(port) not in cls._readers:
+                cls._readers[id(port)] = cls(port)
+            return cls._readers[id(port)]
+
+    def subscribe(
+        self, select: Callable[[mido.Message], bool], tap: Optional[Callable] = None
+    ):
+        """Queue of the selected messages, None once the port is closed.
+
+        `tap` is called back with each message before it is queued, from the
+        reader thread: both see the same messages.
+        """
+        queue = SimpleQueue()
+        with MidiReader._lock:
+            self._subs.append((select, tap, queue))
+            if not self._running:
+                self._running = True
+                self.start()
+        return queue
+
+    def tap(self, select: Callable[[mido.Message], bool], callback: Callable):
+        """Calls back with the selected messages, from the reader thread"""
+        with MidiReader._lock:
+            self._subs.append((select, callback, None))
+
+    def iterate(
+        self, select: Callable[[mido.Message], bool], tap: Optional[Callable] = None
+    ):
+        """Selected messages, until the port is closed"""
+        queue = self.subscribe(select, tap)  # now, not on the first next()
+
+        def messages():
+            msg = queue.get()
+            while msg is not None:  # not iter(queue.get, None): no == on messages
+                yield msg
+                msg = queue.get()
+
+        return messages()
+
+    def run(self):
+        try:
+            for msg in self.port:
+                self._dispatch(msg)
+        except Exception as e:  # the port failed
+            logging.exception(e)
+        for _, _, queue in self._subs:
+            if queue is not None:
+                queue.put(None)
+
+    def _dispatch(self, msg: mido.Message):
+        """A failing subscriber only loses this message"""
+        for select, callback, queue in self._subs:
+            selected = False
+            try:
+                selected = select(msg)
+                if selected and callback is not None:
+                    callback(msg)
+            except Exception as e:
+                logging.exception(e)
+            if selected and queue is not None:
+                queue.put(msg)
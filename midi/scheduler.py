@@ -1,30 +1,20 @@
 import time
-from typing import Optional, TYPE_CHECKING
+import threading
+from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from midi.device import MidiDevice
 from reactivex import from_iterable
 from reactivex.abc import ObserverBase
 from reactivex.scheduler import EventLoopScheduler
 from reactivex.disposable import CompositeDisposable, MultipleAssignmentDisposable
-from midi.messages import MidiMessage, TrackSelection
+from midi.messages import MessageQueue, MidiMessage, TrackSelection
 
 class MidiScheduler(EventLoopScheduler):
-    _lock = False
-    _midiout = []
     _flowrate = 0.005
 
-    def schedule_out(self, action, state: Optional[MidiMessage] = None):
-        if state is None or self._lock:
-            return
-        self._lock = True
-        rate = self._flowrate
-        with state.to_mido() as msg:
-            start = time.time()
-            self.schedule_relative(rate, action, msg)
-            rate += self._flowrate - time.time() + start
-        self._lock = False
-
     def schedule_in(self, dev: "MidiDevice", proxy: ObserverBase[MidiMessage]):
+        if dev.input_mode == "event":
+            return self.schedule_events(dev, proxy)
         disp = MultipleAssignmentDisposable()
         disp.disposable = from_iterable(dev.init_actions).subscribe(
             proxy.on_next, proxy.on_error
@@ -38,7 +28,7 @@ class MidiScheduler(EventLoopScheduler):
                 return disp
             cdisp = CompositeDisposable(disp.disposable)
             try:
-                with MidiMessage.from_mido(dev.messages) as msg:
+                for msg in MessageQueue(dev.messages):
                     if msg.bytes() != state:
                         cdisp.add(
                             dev.to_messages(msg).subscribe(
@@ -46,6 +36,7 @@ class MidiScheduler(EventLoopScheduler):
                             )
                         )
                         dev.debug(msg)
+                        dev.record("in", msg)
                         state = msg.bytes()
             except TrackSelection as e:
                 dev.channel = e.channel
@@ -58,3 +49,41 @@ class MidiScheduler(EventLoopScheduler):
 
         return self.schedule(action, [])
 
+    def schedule_events(self, dev: "MidiDevice", proxy: ObserverBase[MidiMessage]):
+        """Handles the device messages as soon as its port reader gets them"""
+        disp = CompositeDisposable(
+            from_iterable(dev.init_actions).subscribe(proxy.on_next, proxy.on_error)
+        )
+        queue = dev.reader.subscribe(lambda msg: msg.type not in ["clock", "start"])
+        state = []
+
+        def action(sched, messages):
+            nonlocal state
+            try:
+                for msg in MessageQueue(messages):
+                    if msg.bytes() != state:
+                        disp.add(
+                            dev.to_messages(msg).subscribe(
+                                proxy.on_next, proxy.on_error, scheduler=sched
+                            )
+                        )
+                        dev.debug(msg)
+                        dev.record("in", msg)
+                        state = msg.bytes()
+            except TrackSelection as e:
+                dev.channel = e.channel
+            except Exception as e:
+                proxy.on_error(e)
+
+        def wait():
+            while not disp.is_disposed:
+                messages = dev.pending(queue)
+                if messages is None or dev.is_closed:
+                    break
+                if len(messages) > 0:
+                    self.schedule(action, messages)
+            proxy.on_completed()
+            disp.dispose()
+
+        threading.Thread(target=wait, name=dev.name + " input", daemon=True).start()
+        return disp
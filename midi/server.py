@@ -1,16 +1,77 @@
 import os
-from typing import Iterator
+import time
+import socket
 import logging
+import selectors
+import threading
+from queue import Full, Queue, SimpleQueue
+from typing import Iterable, Iterator, Optional
 import mido
+from midi.clock import is_tempo_request
+
+
+class ClientWriter(threading.Thread):
+    """A client of the server, its messages written by its own thread.
+
+    Sending only queues the message, so a client that doesn't read delays
+    nobody: past `size` pending messages, the new ones are dropped.
+    """
+
+    def __init__(self, port: mido.sockets.SocketPort, size=1024):
+        super().__init__(name="[NET] Writer " + port.name, daemon=True)
+        self.port = port
+        self.dropped = 0
+        self._queue: "Queue[Optional[mido.Message]]" = Queue(size)
+        self.start()
+
+    @property
+    def closed(self):
+        return self.port.closed
+
+    def iter_pending(self):
+        return self.port.iter_pending()
+
+    def send(self, msg: mido.Message):
+        try:
+            self._queue.put_nowait(msg)
+        except Full:
+            self.dropped += 1
+
+    def close(self):
+        self.port.close()
+        try:
+            self._queue.put_nowait(None)  # wakes the writer
+        except Full:
+            pass
+
+    def run(self):
+        msg = self._queue.get()
+        while msg is not None and not self.port.closed:
+            try:
+                self.port.send(msg)
+            except (OSError, ValueError):  # closed by the other end, or here
+                self.port.close()
+                break
+            msg = self._queue.get()
 
 
 class ClientSet(set):
-    def __iter__(self) -> Iterator[mido.sockets.SocketPort]:
-        for client in super().__iter__():
-            if client.closed:
-                logging.warn("%s disconnected", client.name)
-                self.remove(client)
-        return super().__iter__()
+    """Clients added by the device loop, sent to from the other threads"""
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+
+    def add(self, client: ClientWriter):
+        with self._lock:
+            super().add(client)
+
+    def __iter__(self) -> Iterator[ClientWriter]:
+        with self._lock:
+            for client in [c for c in super().__iter__() if c.closed]:
+                logging.warning("%s disconnected", client.name)
+                self.discard(client)
+            return iter(list(super().__iter__()))
 
 
 HOSTNAME = os.environ.get("__HOST_NAME__", "localhost")
@@ -22,14 +83,264 @@ class MidiServer(mido.sockets.PortServer):
             super().__init__(HOSTNAME, portno)
             logging.info("[NET] Started midi server on %s:%i", HOSTNAME, portno)
         self.clients = ClientSet()
+        self.tempo_clients: "set[ClientWriter]" = set()
 
     def __iter__(self):
         new_client = self.accept(block=False)
         if new_client:
             logging.info("Connection from %s", new_client.name)
-            self.clients.add(new_client)
+            self.clients.add(ClientWriter(new_client))
+            self.ports.append(new_client)  # closed with the server
         return self.clients.__iter__()
 
+    def send(self, msg: mido.Message):
+        """Queues a message to every client, from any thread"""
+        for client in self.clients:
+            client.send(msg)
+
+    def pending(self):
+        """Messages of the clients, minus their tempo requests"""
+        messages = []
+        for client in self:
+            for msg in client.iter_pending():
+                if is_tempo_request(msg):
+                    self.tempo_clients.add(client)
+                else:
+                    messages.append(msg)
+        self.tempo_clients = {c for c in self.tempo_clients if not c.closed}
+        return messages
+
+    def send_clock(self, msg: mido.Message, tempo: Optional[mido.Message]):
+        """A clock message to the clients, or its tempo message to those asking"""
+        for client in self.clients:
+            out = tempo if client in self.tempo_clients else msg
+            if out is not None:
+                client.send(out)
+
     def __del__(self):
         if not self.closed:
             self.close()
+
+
+class NetClient:
+    """A socket of the bridge, with its parser and its pending output"""
+
+    def __init__(self, sock: socket.socket, name: str, peer=None):
+        self.sock = sock
+        self.name = name
+        self.peer: "Optional[tuple[str, int]]" = peer  # reconnected if set
+        self.connected = peer is None  # accepted clients are
+        self.events = 0
+        self.parser = mido.Parser()
+        self.out = bytearray()
+        self.full_since: Optional[float] = None
+        self.dropped = 0
+        self.tempo = False  # tempo + position messages instead of the ticks
+
+
+class NetBridge(threading.Thread):
+    """MIDI over TCP, served by one selector thread (ex: editors, a backup rig).
+
+    Listens on `portno`, and connects to the `peers` ("host" or "host:port"),
+    reconnecting when they go away. The messages sent are queued to each
+    client and written in batches. A client that doesn't read loses the new
+    messages past `limit` pending bytes, and is dropped after `stall` seconds.
+    The clients messages are parsed here, the device only drains them.
+    """
+
+    retry = 2.0  # seconds between two connections to a peer
+
+    def __init__(
+        self, portno=None, peers: "Iterable[str]" = (), limit=1 << 16, stall=5.0
+    ):
+        super().__init__(name="[NET] Bridge %s" % portno, daemon=True)
+        self.limit = limit
+        self.stall = stall
+        self.closed = False
+        self.clients: "dict[socket.socket, NetClient]" = {}
+        self.inbox: "SimpleQueue[mido.Message]" = SimpleQueue()
+        self.selector = selectors.DefaultSelector()
+        self._lock = threading.Lock()
+        self._wake_in, self._wake_out = socket.socketpair()
+        for sock in [self._wake_in, self._wake_out]:
+            sock.setblocking(False)
+        self.selector.register(self._wake_in, selectors.EVENT_READ)
+        self.server: Optional[socket.socket] = None
+        if portno is not None:
+            self.server = socket.create_server((HOSTNAME, portno))
+            self.server.setblocking(False)
+            self.selector.register(self.server, selectors.EVENT_READ)
+            self.portno = self.server.getsockname()[1]
+            logging.info("[NET] Started midi bridge on %s:%i", HOSTNAME, self.portno)
+        self._peers: "dict[tuple[str, int], Optional[float]]" = {}
+        for peer in peers:
+            host, _, port = peer.partition(":")
+            self._peers[(host, int(port or portno))] = 0.0  # next connection
+        self.start()
+
+    def __iter__(self):
+        """The bridge is the one port of its clients messages"""
+        return iter([self])
+
+    def iter_pending(self):
+        while not self.inbox.empty():
+            yield self.inbox.get_nowait()
+
+    def pending(self):
+        """Messages of the clients, parsed by the bridge thread"""
+        return list(self.iter_pending())
+
+    def send(self, msg: mido.Message):
+        """Queues a message to every client, from any thread"""
+        data = bytes(msg.bytes())
+        self._send(lambda _: data)
+
+    def send_clock(self, msg: mido.Message, tempo: Optional[mido.Message]):
+        """A clock message to the clients, or its tempo message to those asking"""
+        data = bytes(msg.bytes())
+        tempo_data = bytes(tempo.bytes()) if tempo is not None else b""
+        self._send(lambda client: tempo_data if client.tempo else data)
+
+    def _send(self, data_of):
+        wake = False
+        with self._lock:
+            for client in self.clients.values():
+                data = data_of(client)
+                if not client.connected or not data:
+                    continue
+                if len(client.out) + len(data) > self.limit:
+                    client.dropped += 1
+                    if client.full_since is None:
+                        client.full_since = time.monotonic()
+                    continue
+                wake = wake or not client.out
+                client.out += data
+        if wake:
+            self._wake()
+
+    def close(self):
+        self.closed = True
+        self._wake()
+
+    def _wake(self):
+        try:
+            self._wake_out.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass  # already awake, or closed
+
+    def run(self):
+        while not self.closed:
+            timeout = self._connect()
+            for key, events in self.selector.select(timeout):
+                sock = key.fileobj
+                try:
+                    if sock is self._wake_in:
+                        self._wake_in.recv(4096)
+                        self._flush_all()
+                    elif sock is self.server:
+                        self._accept()
+                    else:
+                        self._handle(self.clients[sock], events)  # type: ignore
+                except OSError as e:
+                    if sock in self.clients:
+                        self._drop(self.clients[sock], e)  # type: ignore
+            self._check_stalls()
+        for client in list(self.clients.values()):
+            self._drop(client, "bridge closed", reconnect=False)
+        for sock in [self.server, self._wake_in, self._wake_out]:
+            if sock is not None:
+                sock.close()
+        self.selector.close()
+
+    def _connect(self):
+        """Connects the peers due, returns the time until the next one"""
+        now = time.monotonic()
+        timeout = 1.0  # stalled clients are checked every second
+        for address, at in self._peers.items():
+            if at is None:
+                continue  # connected, or connecting
+            if at > now:
+                timeout = min(timeout, at - now)
+                continue
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setblocking(False)
+            sock.connect_ex(address)
+            client = NetClient(sock, "%s:%i" % address, peer=address)
+            self._peers[address] = None
+            self._register(client, selectors.EVENT_WRITE)  # writable once connected
+        return timeout
+
+    def _accept(self):
+        sock, address = self.server.accept()  # type: ignore
+        sock.setblocking(False)
+        client = NetClient(sock, "%s:%i" % address[0:2])
+        self._register(client, selectors.EVENT_READ)
+        logging.info("[NET] Connection from %s", client.name)
+
+    def _register(self, client: NetClient, events: int):
+        with self._lock:
+            self.clients[client.sock] = client
+        self.selector.register(client.sock, events)
+        client.events = events
+
+    def _handle(self, client: NetClient, events: int):
+        if not client.connected:
+            error = client.sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+            if error:
+                raise OSError(error, os.strerror(error))
+            client.connected = True
+            logging.info("[NET] Connected to %s", client.name)
+        if events & selectors.EVENT_READ:
+            data = client.sock.recv(4096)
+            if not data:
+                raise OSError("connection closed")
+            client.parser.feed(data)
+            for msg in client.parser:
+                if is_tempo_request(msg):
+                    client.tempo = True
+                else:
+                    self.inbox.put(msg)
+        self._flush(client)
+
+    def _flush(self, client: NetClient):
+        """Writes what the socket takes of the pending messages, in one call"""
+        with self._lock:
+            if client.out:
+                try:
+                    sent = client.sock.send(client.out)
+                except BlockingIOError:
+                    sent = 0  # backed up, the limit and the stall deal with it
+                del client.out[:sent]
+            if not client.out:
+                client.full_since = None
+            events = selectors.EVENT_READ | (selectors.EVENT_WRITE * bool(client.out))
+        if events != client.events:
+            self.selector.modify(client.sock, events)
+            client.events = events
+
+    def _flush_all(self):
+        for client in list(self.clients.values()):
+            if client.connected:
+                try:
+                    self._flush(client)
+                except OSError as e:
+                    self._drop(client, e)
+
+    def _check_stalls(self):
+        now = time.monotonic()
+        for client in list(self.clients.values()):
+            if client.full_since is not None and now - client.full_since > self.stall:
+                self._drop(client, "stalled, %i messages dropped" % client.dropped)
+
+    def _drop(self, client: NetClient, reason, reconnect=True):
+        with self._lock:
+            self.clients.pop(client.sock, None)
+        try:
+            self.selector.unregister(client.sock)
+        except (KeyError, ValueError):
+            pass
+        client.sock.close()
+        if client.peer is not None and reconnect:
+            self._peers[client.peer] = time.monotonic() + self.retry
+        if client.connected:
+            logging.warning("[NET] %s disconnected: %s", client.name, reason)
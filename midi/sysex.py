@@ -0,0 +1,45 @@
+from typing import Sequence
+from utils import MaxByteException
+
+SYNTH_SYSEX_HEAD = [65, 0, 0, 0, 0, 105]
+SYNTH_SYSEX_REQ = [*SYNTH_SYSEX_HEAD, 17]
+SYNTH_SYSEX_CMD = [*SYNTH_SYSEX_HEAD, 18]
+SYNTH_ADDRESSES = {"common": [0, 1], "patch": [16, 0], "inout": [0, 4]}
+
+
+class SysexEncoder:
+    """Sysex data of one SY-1000 address and command, built in one pass.
+
+    Same bytes as `[*command, *utils.checksum(head, data)]`: the header and
+    its sum are computed once, then each encoding carries the bytes over 127
+    to the previous one and sums them while filling a single bytearray.
+    """
+
+    def __init__(self, head: Sequence[int], command: Sequence[int]):
+        self.prefix = bytes([*command, *head])
+        self.start = len(command)
+        self.base = sum(head)
+
+    def encode(self, data: Sequence[int]):
+        size = len(self.prefix)
+        out = bytearray(size + len(data) + 1)
+        out[:size] = self.prefix
+        total = self.base
+        carry = 0
+        for i in range(len(data) - 1, -1, -1):
+            carry, value = divmod(int(data[i]) + carry, 128)
+            out[size + i] = value
+            total += value
+        if carry > 0:  # rare, the carry runs into the address head
+            for i in range(size - 1, self.start - 1, -1):
+                total -= out[i]
+                carry, out[i] = divmod(out[i] + carry, 128)
+                total += out[i]
+            if carry > 0:
+                raise MaxByteException(out[self.start] + carry * 128)
+        out[-1] = -total % 128
+        return out
+
+
+SYSEX_CMD = {a: SysexEncoder(h, SYNTH_SYSEX_CMD) for a, h in SYNTH_ADDRESSES.items()}
+SYSEX_REQ = {a: SysexEncoder(h, SYNTH_SYSEX_REQ) for a, h in SYNTH_ADDRESSES.items()}
@@ -0,0 +1,62 @@
+import os
+import logging
+import threading
+from typing import Callable, Optional
+from reactivex.scheduler import EventLoopScheduler, ThreadPoolScheduler
+from midi.scheduler import MidiScheduler
+
+
+class Topology:
+    """Threads of the devices, configured in one place.
+
+    - clock: the metronome only, on a thread niced up when the OS allows it,
+      which never waits for a device (see `on_clock`)
+    - io: one event loop per device, reading its port and running its handlers
+    - pool: workers for the work that doesn't need ordering (LED refresh)
+
+    A device busy decoding a patch dump only holds its own loop, so the beat
+    and the other devices go on.
+    """
+
+    def __init__(self, workers=2, clock_nice=-10):
+        self.clock_nice = clock_nice
+        self._clock_thread: Optional[int] = None
+        self.clock = EventLoopScheduler(self._thread("[TEM] Clock", self._realtime))
+        self.pool = ThreadPoolScheduler(workers)
+        self._io: dict[str, MidiScheduler] = {}
+        self._lock = threading.Lock()
+
+    def io(self, name: str):
+        """Event loop of a device, created on first use"""
+        with self._lock:
+            if name not in self._io:
+                self._io[name] = MidiScheduler(self._thread(name + " I/O"))
+            return self._io[name]
+
+    @property
+    def on_clock(self):
+        """True on the clock thread"""
+        return threading.get_ident() == self._clock_thread
+
+    def dispose(self):
+        for scheduler in [self.clock, *self._io.values()]:
+            scheduler.dispose()
+        self.pool.executor.shutdown(wait=False)
+
+    def _realtime(self):
+        self._clock_thread = threading.get_ident()
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), self.clock_nice)
+        except (AttributeError, OSError) as e:
+            logging.debug("[TEM] Clock thread priority unchanged: %s", e)
+
+    @staticmethod
+    def _thread(name: str, setup: Callable[[], None] = lambda: None):
+        def factory(target: Callable[[], None]):
+            def run():
+                setup()
+                target()
+
+            return threading.Thread(target=run, name=name, daemon=True)
+
+        return factory
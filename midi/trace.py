@@ -0,0 +1,166 @@
+"""Binary traces of the messages crossing the devices, and their replay.
+
+    python -m midi.trace FILE  # prints a trace
+
+A trace starts with a header (magic, version, start time), then one record
+per message: kind, device id, time since the previous record (µs), payload
+size, payload. The first record of a device names it. MIDI messages are
+stored as their bytes, internal messages as JSON.
+"""
+import sys
+import json
+import time
+import atexit
+import struct
+import threading
+from typing import Callable, Iterator, NamedTuple, Optional, Union
+import mido
+import instruments.messages as internal
+
+MAGIC = b"OCTR"
+VERSION = 1
+HEADER = struct.Struct("<4sBd")  # magic, version, monotonic start time
+RECORD = struct.Struct("<BBIH")  # kind, device id, delta (µs), payload size
+NAME, IN, OUT = 0, 1, 2  # record kinds, INTERNAL flags a JSON payload
+INTERNAL = 0x10
+DIRECTIONS = {"in": IN, "out": OUT}
+MAX_DELTA = 2**32 - 1  # ~71 min, longer gaps are shortened
+
+
+class Record(NamedTuple):
+    time: float  # seconds since the trace started
+    direction: str
+    device: str
+    msg: Union[mido.Message, internal.InternalMessage]
+
+
+def encode(msg) -> "Optional[tuple[int, bytes]]":
+    """Flags and payload of a message, None if it is not one (None, actions)"""
+    if isinstance(msg, mido.Message):
+        return 0, bytes(msg.bytes())
+    if not isinstance(msg, internal.InternalMessage):
+        return None
+    state = dict(vars(msg))
+    payload = [type(msg).__name__, state]
+    return INTERNAL, json.dumps(payload, default=_jsonable).encode()
+
+
+def decode(flags: int, payload: bytes):
+    if not flags & INTERNAL:
+        return mido.Message.from_bytes(payload)
+    name, state = json.loads(payload)
+    cls = getattr(internal, name, internal.InternalMessage)
+    msg = cls.__new__(cls)
+    state["data"] = tuple(state.get("data", []))
+    msg.__dict__.update(state)
+    return msg
+
+
+def _jsonable(value):
+    if hasattr(value, "tolist"):  # numpy values
+        return value.tolist()
+    return str(value)
+
+
+class TraceWriter:
+    """Appends the messages to a trace file, from any thread"""
+
+    def __init__(self, file: str):
+        self.file = file
+        self.start = time.monotonic()
+        self._last = self.start
+        self._devices: "dict[str, int]" = {}
+        self._lock = threading.Lock()
+        self._out = open(file, "wb", buffering=1 << 16)
+        self._out.write(HEADER.pack(MAGIC, VERSION, self.start))
+        atexit.register(self.close)
+
+    def record(self, direction: str, device: str, msg):
+        now = time.monotonic()
+        encoded = encode(msg)
+        if encoded is None:
+            return
+        flags, payload = encoded
+        with self._lock:
+            if self._out.closed:
+                return
+            if device not in self._devices:
+                self._devices[device] = len(self._devices)
+                self._write(NAME, self._devices[device], now, device.encode())
+            kind = DIRECTIONS[direction] | flags
+            self._write(kind, self._devices[device], now, payload)
+
+    def _write(self, kind: int, device: int, now: float, payload: bytes):
+        delta = min(max(round((now - self._last) * 1e6), 0), MAX_DELTA)
+        self._last = now
+        self._out.write(RECORD.pack(kind, device, delta, len(payload)))
+        self._out.write(payload)
+
+    def close(self):
+        with self._lock:
+            if not self._out.closed:
+                self._out.close()
+
+
+def read_trace(file: str) -> Iterator[Record]:
+    with open(file, "rb") as f:
+        magic, version, _ = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("%s is not a version %i trace" % (file, VERSION))
+        devices: "list[str]" = []
+        t = 0
+        while True:
+            head = f.read(RECORD.size)
+            if len(head) < RECORD.size:
+                return  # the end, or a record cut by a crash
+            kind, device, delta, size = RECORD.unpack(head)
+            payload = f.read(size)
+            if len(payload) < size:
+                return
+            t += delta
+            if kind == NAME:
+                devices.append(payload.decode())
+                continue
+            direction = "in" if kind & 0x0F == IN else "out"
+            yield Record(t / 1e6, direction, devices[device], decode(kind, payload))
+
+
+class TraceReplay:
+    """Feeds the messages of a trace back with their timing.
+
+    `speed` scales the time (2 plays twice as fast), 0 feeds them at once.
+    Only the MIDI messages received by the devices are selected by default:
+    the others are what the devices make of them.
+    """
+
+    def __init__(self, file: str, speed=1.0, select: Optional[Callable] = None):
+        self.speed = speed
+        self.select = select or (
+            lambda r: r.direction == "in" and isinstance(r.msg, mido.Message)
+        )
+        self.records = [r for r in read_trace(file) if self.select(r)]
+
+    def play(self, feed: Callable[[str, mido.Message], None]):
+        """Calls back with (device, message) on time, returns the lateness"""
+        lateness = []
+        if not self.records:
+            return lateness
+        origin = self.records[0].time
+        start = time.monotonic()
+        for record in self.records:
+            if self.speed > 0:
+                at = start + (record.time - origin) / self.speed
+                wait = at - time.monotonic()
+                if wait > 0.002:
+                    time.sleep(wait - 0.001)
+                while time.monotonic() < at:  # the last ms is spun, for accuracy
+                    pass
+                lateness.append(time.monotonic() - at)
+            feed(record.device, record.msg)
+        return lateness
+
+
+if __name__ == "__main__":
+    for record in read_trace(sys.argv[1]):
+        msg = record.msg
+        print("%10.6f %-3s %-20s %s %s" % (*record[0:3], msg.type, msg.dict()))
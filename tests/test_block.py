@@ -1,5 +1,5 @@
 import unittest
-from instruments.blocks import Block, CCBlock
+from instruments.blocks import Block, CCBlock, StringBlock
 from midi.messages import MidiCC, MidiNote
 
 
@@ -155,3 +155,33 @@ class TestCCBlock(unittest.TestCase):
                 self.assertEqual(
                     msg.value, 0, "value at [%i][%i] is 0" % (msg.channel, msg.control)
                 )
+
+    def test_current_setter(self):
+        """Sets the value of a knob addressed by its macro"""
+        self.block.current = 178, 0, 64
+        self.assertEqual(self.block.values[2][0], 64, "value at 2 0 is 64")
+        for msg in self.block.message(178, 0, 32):
+            self.assertEqual(msg.data, (2, 32), "explicit value wins")
+
+
+class TestStringBlock(unittest.TestCase):
+    def setUp(self) -> None:
+        self.block = StringBlock(16, (4, 9))
+        return super().setUp()
+
+    def test_block(self):
+        """StringBlock holds 8 channels and the master on a single page"""
+        self.assertEqual(self.block.macro, 144, "block macro is 144")
+        self.assertEqual(self.block.col_size, 8, "block col size is 8")
+        self.assertEqual(self.block.max_col_page, 0, "block max page is 0")
+        for _ in self.block.next():
+            pass
+        self.assertEqual(self.block.col_idx, 0, "block does not page")
+
+    def test_set(self):
+        """Stores the values of every channel, outputs the current one"""
+        values = [10, 20, 30, 40, 50, 60, 0, 0, 70]
+        msgs = list(self.block.set(2, 146, *values))
+        self.assertEqual(self.block.values[2].tolist(), values, "row 2 is set")
+        self.assertEqual(len(msgs), 1, "one CC for the current page")
+        self.assertEqual(msgs[0].bytes(), MidiCC(2, 18, 30).bytes(), "CC 18 ch 2")
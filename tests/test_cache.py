@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+from instruments import Instruments
+from instruments.cache import PatchCache
+
+
+class TestPatchCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cache = PatchCache(size=2)
+        return super().setUp()
+
+    def test_store_type(self):
+        """An instr params are valid while its type doesn't change"""
+        self.assertFalse(self.cache.store_type(3, 21, 0), "new patch")
+        self.assertFalse(self.cache.store_type(3, 21, 0), "no params yet")
+        self.cache.store(3, 22, 5, [32])
+        self.assertFalse(self.cache.store_type(3, 21, 0), "params are requested")
+        self.cache.trust = True
+        self.assertTrue(self.cache.store_type(3, 21, 0), "same type, trusted")
+        self.assertFalse(self.cache.store_type(3, 21, 1), "type changed")
+        self.assertEqual(self.cache.get(3), {"types": {21: 1}, "replies": {}})
+
+    def test_lru(self):
+        """The least recently used patch is dropped first"""
+        for patch in [1, 2]:
+            self.cache.store(patch, 22, 5, [patch])
+        self.cache.get(1)
+        self.cache.store(3, 22, 5, [3])
+        self.assertEqual(len(self.cache), 2, "2 patches at most")
+        self.assertNotIn(2, self.cache, "patch 2 is dropped")
+        self.assertIn(1, self.cache, "patch 1 was used")
+
+    def test_discard(self):
+        """A param change drops its instrument only"""
+        self.cache.store_type(1, 21, 0)
+        self.cache.store_type(1, 32, 1)
+        self.cache.store(1, 22, 5, [32])
+        self.cache.store(1, 35, 8, [12])
+        self.cache.discard(1, 22)
+        state = self.cache.get(1)
+        assert state is not None, "patch is cached"
+        self.assertEqual(state["types"], {32: 1}, "instr 21 type is dropped")
+        self.assertEqual(state["replies"], {(35, 8): [12]}, "instr 21 params too")
+
+    def test_replay(self):
+        """Cached replies decode like the SY1000 answers"""
+        instruments = Instruments(10, 21, 32, 43)
+        self.cache.store_type(1, 21, 0)
+        self.cache.store(1, 22, 16, [64])
+        state = self.cache.get(1)
+        assert state is not None, "patch is cached"
+        for instr, typx in state["types"].items():
+            instruments.set(instr, typx)
+        (key, data), *_ = state["replies"].items()
+        messages = list(instruments.receive(*key, data))
+        self.assertEqual(len(messages), 1, "one param message")
+        self.assertEqual(messages[0].macro, 180, "macro is 180")
+
+    def test_get_copy(self):
+        """A state read on one thread isn't changed by a discard on another"""
+        self.cache.store(1, 22, 5, [1])
+        state = self.cache.get(1)
+        assert state is not None, "patch is cached"
+        self.cache.discard(1, 22)
+        self.assertEqual(state["replies"], {(22, 5): [1]}, "a copy")
+        self.assertEqual(self.cache.get(1), {"types": {}, "replies": {}}, "discarded")
+
+    def test_save_load(self):
+        """Patches are saved in LRU order"""
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, "patches.json")
+            self.cache.store_type(7, 21, 0)
+            self.cache.store(7, 22, 5, [1, 2])
+            self.cache.store(8, 33, 2, [3])
+            self.cache.get(7)
+            patches = self.cache.snapshot()
+            self.cache.store(9, 22, 5, [4])  # after the snapshot
+            self.cache.save(file, patches)
+            cache = PatchCache(size=2, file=file)
+            self.assertEqual(list(cache._patches), [8, 7], "same order")
+            self.assertEqual(os.listdir(directory), ["patches.json"], "replaced")
+            self.assertEqual(cache.get(7), self.cache.get(7), "same state")
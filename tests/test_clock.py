@@ -0,0 +1,51 @@
+import unittest
+import mido
+from audio.timeline import ClockTimeline
+from midi.clock import TEMPO_REQUEST, ClockFanout, is_tempo_request, tempo_message
+
+
+class Server:
+    def __init__(self):
+        self.sent: "list[tuple[mido.Message, mido.Message]]" = []
+
+    def send_clock(self, msg, tempo):
+        self.sent.append((msg, tempo))
+
+
+class TestClock(unittest.TestCase):
+    def test_tempo_message(self):
+        """Tempo in centi-BPM and beats, 3 x 7 bits each"""
+        msg = tempo_message(123.45, 300)
+        self.assertEqual(len(msg.bytes()), 12, "12 bytes")
+        self.assertEqual(list(msg.data[4:7]), [0, 96, 57], "12345")
+        self.assertEqual(list(msg.data[7:10]), [0, 2, 44], "300")
+        self.assertTrue(is_tempo_request(TEMPO_REQUEST), "request")
+        self.assertFalse(is_tempo_request(msg), "not a request")
+
+    def test_fanout(self):
+        """Every tick goes out, with a tempo message on each beat"""
+        server = Server()
+        fanout = ClockFanout(server)
+        fanout.send(mido.Message("start"))
+        for _ in range(49):
+            fanout.send(mido.Message("clock"))
+        fanout.send(mido.Message("stop"))
+        fanout.send(mido.Message("note_on"))
+        self.assertEqual(len(server.sent), 51, "start, ticks, stop")
+        start, stop = server.sent[0], server.sent[-1]
+        self.assertEqual([m.type for m in start], ["start", "start"], "both get it")
+        self.assertEqual([m.type for m in stop], ["stop", "stop"], "both get it")
+        tempos = [tempo for _, tempo in server.sent[1:-1] if tempo is not None]
+        self.assertEqual(len(tempos), 3, "beats 0, 1 and 2")
+        self.assertEqual([t.data[9] for t in tempos], [0, 1, 2], "beats")
+        fanout.send(mido.Message("start"))
+        fanout.send(mido.Message("clock"))
+        self.assertEqual(server.sent[-1][1].data[9], 0, "start resets the beats")
+
+    def test_timeline(self):
+        """The fanout ticks the timeline it shares, on clock messages only"""
+        timeline = ClockTimeline()
+        fanout = ClockFanout(Server(), timeline)
+        for msg in ["start", "clock", "clock", "stop", "continue", "clock"]:
+            fanout.send(mido.Message(msg))
+        self.assertEqual(len(timeline), 3, "3 ticks")
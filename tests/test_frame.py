@@ -0,0 +1,50 @@
+import unittest
+import mido
+from midi.frame import Frame
+from midi.messages import MidiCC, MidiNote
+
+
+class TestFrame(unittest.TestCase):
+    def setUp(self) -> None:
+        self.frame = Frame()
+        return super().setUp()
+
+    def test_refresh(self):
+        """Only the changed cells are refreshed, with their last value"""
+        self.frame.put(MidiNote(0, 53))
+        self.frame.put(MidiNote(1, 53))
+        self.frame.put(MidiCC(0, 48, 12))
+        self.frame.put(MidiCC(0, 48, 64))
+        self.assertEqual(len(self.frame), 3, "3 cells to refresh")
+        messages = self.frame.refresh()
+        self.assertEqual(len(messages), 3, "3 cells refreshed")
+        self.assertEqual(messages[-1].value, 64, "last CC value")
+        self.frame.put(MidiNote(0, 53))
+        self.frame.put(MidiNote(1, 53, 0))
+        messages = self.frame.refresh()
+        self.assertEqual(len(messages), 1, "only note 53 on channel 1 changed")
+        self.assertEqual(messages[0].type, "note_off", "note 53 is off")
+
+    def test_request(self):
+        """One refresh is requested until it runs"""
+        self.assertTrue(self.frame.request(), "first request")
+        self.assertFalse(self.frame.request(), "already requested")
+        self.frame.refresh()
+        self.assertTrue(self.frame.request(), "requested again")
+
+    def test_seen(self):
+        """Values shown by the surface itself are not sent again"""
+        self.frame.seen(MidiCC(0, 48, 100))
+        self.frame.put(MidiCC(0, 48, 100))
+        self.assertEqual(self.frame.refresh(), [], "knob ring is up to date")
+        self.frame.put(MidiCC(0, 48, 0))
+        self.assertEqual(len(self.frame.refresh()), 1, "knob ring is reset")
+
+    def test_clear(self):
+        """Clearing redraws everything"""
+        self.frame.put(MidiNote(0, 53))
+        self.frame.refresh()
+        self.frame.clear()
+        self.frame.put(MidiNote(0, 53))
+        self.assertEqual(len(self.frame.refresh()), 1, "note is redrawn")
+        self.assertFalse(self.frame.put(mido.Message("stop")), "stop is no cell")
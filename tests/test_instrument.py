@@ -1,5 +1,8 @@
+import random
 import unittest
-from instruments import DynaSynth
+from instruments import DynaSynth, GR300, Instrument, Instruments, OscSynth
+from instruments.params import LFO
+from instruments.planner import merge_ranges
 from instruments.messages import MacroMessage, StepMessage
 
 request_values = [
@@ -31,17 +34,17 @@ class TestInstrument(unittest.TestCase):
                 self.assertEqual(msg.data, request_values[i], "values are correct")
 
     def test_receive(self):
-        for msg in self.instr.receive(5, [32]):
+        for msg in self.instr.dispatch(22, 5, [32]):
             assert isinstance(msg, MacroMessage), "message is macro message"
             self.assertEqual(msg.macro, 176, "macro is 176")
             self.assertEqual(msg.idx, 1, "inst idx is 1")
             self.assertEqual(msg.value, 64, "value is 64")
-        for msg in self.instr.receive(16, [64]):
+        for msg in self.instr.dispatch(22, 16, [64]):
             assert isinstance(msg, MacroMessage), "message is macro message"
             self.assertEqual(msg.macro, 180, "macro is 180")
             self.assertEqual(msg.idx, 1, "inst idx is 1")
             self.assertEqual(msg.value, 64, "value is 64")
-        for i, msg in enumerate(self.instr.receive(29, [1, 1, 0, 50, 114, 14])):
+        for i, msg in enumerate(self.instr.dispatch(22, 29, [1, 1, 0, 50, 114, 14])):
             with self.subTest(i=i):
                 assert isinstance(msg, MacroMessage), "message is macro message"
                 if i == 1:
@@ -57,6 +60,34 @@ class TestInstrument(unittest.TestCase):
                     self.assertEqual(msg.idx, 1, "inst idx is 1")
                     self.assertEqual(msg.value, 0, "value is 0")
 
+    def test_bulk_request(self):
+        """Params are read at once, within the max request size"""
+        requests = [msg.data[7:-1] for msg in self.instr.bulk_request]
+        self.assertEqual(len(requests), 3, "3 reads instead of 7")
+        self.assertEqual(requests[0], (16, 0, 21, 6, 0, 0, 0, 12), "strings")
+        self.assertEqual(requests[1], (16, 0, 22, 5, 0, 0, 0, 47), "pots")
+        self.assertEqual(requests[2], (16, 0, 22, 59, 0, 0, 0, 125), "sequencer")
+
+    def test_dispatch(self):
+        """Bulk answers decode like the answers to each param request"""
+        for param in [*DynaSynth.params, *OscSynth.params]:  # class level params
+            if isinstance(param, LFO):
+                self.addCleanup(setattr, param, "shape", param.shape)
+        for instr in [DynaSynth(21), OscSynth(21)]:
+            memory = [random.randrange(0, 128) for _ in range(50 * 128)]
+            expected, messages = [], []
+            for msg in instr.request:
+                _, _, hi, lo, _, _, _, size = msg.data[7:-1]
+                data = memory[hi * 128 + lo : hi * 128 + lo + size]
+                expected += [m.dict() for m in instr.dispatch(hi, lo, data)]
+            for start, size in instr.reads:
+                data = memory[start : start + size]
+                messages += [m.dict() for m in instr.dispatch(0, start, data)]
+            with self.subTest(instr=type(instr).__name__):
+                self.assertListEqual(
+                    sorted(messages, key=str), sorted(expected, key=str), "same"
+                )
+
     def test_send(self):
         lfo_msg = MacroMessage("synth", 1, 179, 64)
         grid_msg = StepMessage(1, 53, 82, 3, 12, 127)
@@ -66,3 +97,41 @@ class TestInstrument(unittest.TestCase):
         for msg in self.instr.send(grid_msg):
             self.assertEqual(msg.address, (16, 0, 22, 75), "address is correct")
             self.assertEqual(msg.body[0], 33, "value is 33 (+1st)")
+
+
+class TestInstruments(unittest.TestCase):
+    def setUp(self) -> None:
+        self.instruments = Instruments(10, 21, 32, 43)
+        return super().setUp()
+
+    def test_get(self):
+        """Get an instrument by its position or any of its address bytes"""
+        self.assertIs(self.instruments.get(1), self.instruments[1], "position 1")
+        self.assertIs(self.instruments.get(31), self.instruments[1], "byte 31")
+        self.assertIs(self.instruments.get(32), self.instruments[2], "byte 32")
+        with self.assertRaises(Exception):
+            self.instruments.get(60)
+
+    def test_set(self):
+        """Swapping an instrument type updates the addresses"""
+        self.instruments.set(21, 2)
+        self.assertIsInstance(self.instruments[1], GR300, "instr 1 is a GR300")
+        self.assertIs(self.instruments.get(25), self.instruments[1], "byte 25")
+        self.assertIsInstance(self.instruments[0], Instrument, "instr 0 is kept")
+
+    def test_receive(self):
+        """Decodes an answer through the address index"""
+        self.instruments.set(21, 0)
+        messages = list(self.instruments.receive(22, 5, [32]))
+        self.assertEqual(len(messages), 1, "1 message")
+        self.assertEqual(messages[0].macro, 176, "macro is 176")
+        self.assertEqual(list(self.instruments.receive(22, 7, [32])), [], "no param")
+
+
+class TestPlanner(unittest.TestCase):
+    def test_merge_ranges(self):
+        """Overlapping, adjacent and close ranges are merged up to the max size"""
+        ranges = [(10, 4), (12, 6), (18, 2), (40, 3), (59, 125), (300, 1)]
+        merged = merge_ranges(ranges, 127)
+        self.assertEqual(merged, [(10, 33), (59, 125), (300, 1)], "3 reads")
+        self.assertEqual(merge_ranges([(0, 200)], 127), [(0, 200)], "kept whole")
@@ -0,0 +1,75 @@
+import io
+import atexit
+import logging
+import threading
+import unittest
+import mido
+from utils import log
+
+
+class Fields(dict):
+    """Message fields counting their formatting, and the threads doing it"""
+
+    def __init__(self, threads: "list[str]", **fields):
+        super().__init__(**fields)
+        self.threads = threads
+
+    def __repr__(self):
+        self.threads.append(threading.current_thread().name)
+        return super().__repr__()
+
+
+class Spy:
+    """A message whose fields count their formatting"""
+
+    type = "note_on"
+
+    def __init__(self):
+        self.threads: "list[str]" = []
+        self.note = 60
+
+    def dict(self):
+        return Fields(self.threads, note=self.note)
+
+
+class TestLog(unittest.TestCase):
+    def setUp(self) -> None:
+        root = logging.getLogger()
+        handlers, level = root.handlers[:], root.level
+        self.addCleanup(setattr, log, "enabled", log.enabled)
+        self.addCleanup(setattr, root, "handlers", handlers)
+        self.addCleanup(root.setLevel, level)
+        return super().setUp()
+
+    def setup(self, level: int):
+        listener = log.setup(level, format="%(message)s")
+        atexit.unregister(listener.stop)  # stopped by the tests
+        stream = io.StringIO()
+        listener.handlers[0].setStream(stream)  # type: ignore
+        return listener, stream
+
+    def test_disabled(self):
+        """The flag is off above the DEBUG level"""
+        listener, stream = self.setup(logging.INFO)
+        self.assertFalse(log.enabled, "debug is off")
+        listener.stop()
+        self.assertEqual(stream.getvalue(), "", "nothing written")
+
+    def test_enabled(self):
+        """Messages are formatted and written by the listener thread"""
+        listener, stream = self.setup(logging.DEBUG)
+        self.assertTrue(log.enabled, "debug is on")
+        spy = Spy()
+        log.message("[MID] Akai APC40", "OUT", spy)
+        spy.note = 61  # messages are mutable, the record keeps a copy
+        self.assertEqual(spy.threads, [], "not formatted by the caller")
+        listener.stop()
+        line = "[MID] Akai APC40 Note_on message OUT: {'note': 60}\n"
+        self.assertEqual(stream.getvalue(), line, "written")
+        self.assertNotIn(threading.current_thread().name, spy.threads, "listener")
+
+    def test_message(self):
+        """A message is formatted like the device logs"""
+        msg = mido.Message("program_change", program=3)
+        line = "Program_change message IN: %s" % msg.dict()
+        self.assertEqual(str(log.Message("IN", msg)), line)
@@ -0,0 +1,49 @@
+import unittest
+from midi.messages import MessageQueue, MidiCC, MidiNote, SysexCmd, TrackSelection
+
+
+class TestMessageQueue(unittest.TestCase):
+    def test_order(self):
+        """CC/sysex come out first, latest first, then notes in order"""
+        queue = MessageQueue(
+            [
+                MidiNote(0, 53),
+                MidiCC(0, 48, 1),
+                MidiNote(0, 54),
+                MidiCC(0, 49, 2),
+                SysexCmd("patch", [22, 5, 32]),
+            ]
+        )
+        self.assertEqual(len(queue), 5, "5 messages")
+        types = [msg.type for msg in queue]
+        self.assertEqual(
+            types,
+            ["sysex", "control_change", "control_change", "note_on", "note_on"],
+            "LIFO then FIFO",
+        )
+        self.assertEqual(len(queue), 0, "iterating empties the queue")
+
+    def test_coalesce(self):
+        """Only the last CC/sysex to an address is kept"""
+        queue = MessageQueue()
+        queue.add(MidiCC(0, 48, 1))
+        queue.add(MidiCC(0, 49, 2))
+        queue.add(MidiCC(0, 48, 3))
+        queue.add(SysexCmd("patch", [22, 5, 32]))
+        queue.add(SysexCmd("patch", [22, 5, 64]))
+        queue.add(SysexCmd("patch", [22, 5, 64, 1]))
+        self.assertEqual(len(queue), 4, "4 addresses")
+        sysex = queue.pop()
+        self.assertEqual(sysex.body, (64, 1), "longer sysex is another address")
+        self.assertEqual(queue.pop().body, (64,), "last sysex wins")
+        cc = queue.pop()
+        self.assertEqual((cc.control, cc.value), (48, 3), "last CC 48 wins")
+        self.assertEqual(queue.pop().control, 49, "CC 49 is kept")
+
+    def test_track_selection(self):
+        """Track selection bursts are detected"""
+        burst = [MidiCC(2, ctl, 0) for ctl in range(16, 24)]
+        with self.assertRaises(TrackSelection) as ctx:
+            MessageQueue(burst)
+        self.assertEqual(ctx.exception.channel, 2, "channel 2 is selected")
+        self.assertEqual(len(MessageQueue([])), 0, "empty queue")
@@ -0,0 +1,56 @@
+import json
+import unittest
+from types import SimpleNamespace
+from urllib.request import urlopen
+from numpy import ones, float32
+from audio import AudioMetrics, MetricsReporter, RingBuffer
+
+
+class TestAudioMetrics(unittest.TestCase):
+    def setUp(self) -> None:
+        self.ring = RingBuffer(100, 2)
+        self.metrics = AudioMetrics(48000, self.ring)
+        return super().setUp()
+
+    def test_record(self):
+        """Callbacks are counted by duration and budget"""
+        self.metrics.record(1.0, 1.0105, 1024)  # 10.5ms of a 21.3ms block
+        self.metrics.record(2.0, 2.0001, 1024)
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(snapshot["callbacks"], 2, "2 callbacks")
+        self.assertEqual(snapshot["histogram"], {128: 1, 16384: 1}, "log2 buckets")
+        self.assertAlmostEqual(snapshot["peak"], 0.49, 2, "peak budget")
+        self.assertAlmostEqual(snapshot["budget"], 0.005, 3, "last budget")
+        self.assertEqual(self.metrics.snapshot()["peak"], 0, "peak is reset")
+
+    def test_xruns(self):
+        """Status flags are counted"""
+        status = SimpleNamespace(input_overflow=True, output_underflow=False)
+        self.metrics.record(0, 0, 64, status)
+        self.metrics.record(0, 0, 64, None)
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(snapshot["xruns"], 1, "1 xrun")
+        self.assertEqual(snapshot["flags"]["input_overflow"], 1, "input overflow")
+        self.assertEqual(snapshot["flags"]["output_underflow"], 0, "no underflow")
+
+    def test_ring(self):
+        """Ring fill is sampled with the counters"""
+        self.ring.push(ones((25, 2), dtype=float32))
+        ring = self.metrics.snapshot()["ring"]
+        self.assertEqual(ring["fill"], 0.25, "ring is a quarter full")
+        self.assertEqual(ring["overruns"], 0, "no overrun")
+
+    def test_endpoint(self):
+        """Counters are served as JSON"""
+        reporter = MetricsReporter(self.metrics, 60, port=0)
+        self.addCleanup(reporter.stop)
+        self.metrics.record(0, 0.001, 48)
+        assert reporter.server is not None, "server is started"
+        host, port = reporter.server.server_address[:2]
+        with urlopen("http://%s:%i" % (host, port), timeout=1) as response:
+            snapshot = json.loads(response.read())
+        self.assertEqual(snapshot["callbacks"], 1, "1 callback")
+        self.assertEqual(snapshot["peak"], 1.0, "peak isn't reset by a request")
+        with self.assertLogs(level="INFO") as logs:
+            reporter.report()
+        self.assertIn("1 callbacks, 100% budget", logs.output[0], "report is logged")
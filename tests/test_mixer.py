@@ -0,0 +1,73 @@
+import unittest
+from numpy import array, full, ones, shares_memory, zeros, float32
+from numpy.testing import assert_allclose
+from audio import Mixer, to_gains
+
+
+class TestGains(unittest.TestCase):
+    def test_centered(self):
+        """Centered pans and crossfader halve every channel"""
+        gains = to_gains(ones(8, dtype=float32), full(8, 0.5, dtype=float32), 0.5)
+        assert_allclose(gains, [0.5] * 8, err_msg="all gains are 0.5")
+
+    def test_crossfader(self):
+        """Strings follow the crossfader, outputs follow their own pan"""
+        volumes = array([1, 1, 0.5, 1, 1, 1, 1, 1], dtype=float32)
+        pans = array([0, 1, 0, 0, 0, 0, 0.25, 0.25], dtype=float32)
+        gains = to_gains(volumes, pans, 1.0)
+        assert_allclose(gains[0:3], [0, 1, 0], err_msg="only string 2 is on B side")
+        assert_allclose(gains[6:8], [0.75, 0.25], err_msg="OUT-L/R are panned")
+
+
+class TestMixer(unittest.TestCase):
+    def setUp(self) -> None:
+        self.mixer = Mixer(8, 4)
+        return super().setUp()
+
+    def test_buffer(self):
+        """Scratch buffer is zeroed and reused"""
+        buffer = self.mixer.buffer(4)
+        buffer += 1
+        self.assertEqual(self.mixer.buffer(4).sum(), 0, "buffer is zeroed")
+        grown = self.mixer.buffer(16)
+        self.assertEqual(len(grown), 16, "buffer grows if needed")
+        small = self.mixer.buffer(2)
+        self.assertEqual(len(small), 2, "2 frames block")
+        self.assertTrue(shares_memory(small, grown), "a smaller block is a view")
+
+    def test_mix(self):
+        """Adds the gained playback to the input"""
+        indata = full((4, 8), 0.25, dtype=float32)
+        outdata = full((4, 8), 9, dtype=float32)
+        self.mixer.buffer(4)[:] = 1
+        self.mixer.mix(indata, outdata)
+        assert_allclose(outdata, full((4, 8), 1.25), err_msg="full playback")
+        volumes = array([0, 0.5, 1, 1, 1, 1, 1, 1], dtype=float32)
+        self.mixer.update(volumes, zeros(8, dtype=float32), 0, smooth=False)
+        self.mixer.buffer(4)[:] = 1
+        self.mixer.mix(indata, outdata)
+        assert_allclose(outdata[:, 0], [0.25] * 4, err_msg="muted playback")
+        assert_allclose(outdata[:, 1], [0.75] * 4, err_msg="half playback")
+        assert_allclose(outdata[:, 2], [1.25] * 4, err_msg="full playback")
+
+    def test_update(self):
+        """New gains are ramped over one block, then applied as is"""
+        indata = zeros((4, 8), dtype=float32)
+        outdata = zeros((4, 8), dtype=float32)
+        volumes = zeros(8, dtype=float32)
+        self.mixer.update(volumes, full(8, 0.5, dtype=float32), 0.5)
+        self.mixer.buffer(4)[:] = 1
+        self.mixer.mix(indata, outdata)
+        assert_allclose(outdata[:, 0], [0.75, 0.5, 0.25, 0], err_msg="ramps down")
+        self.mixer.buffer(4)[:] = 1
+        self.mixer.mix(indata, outdata)
+        assert_allclose(outdata, zeros((4, 8)), err_msg="stays muted")
+
+    def test_update_now(self):
+        """Gains can be applied without smoothing"""
+        outdata = zeros((4, 8), dtype=float32)
+        volumes = zeros(8, dtype=float32)
+        self.mixer.update(volumes, full(8, 0.5, dtype=float32), 0.5, smooth=False)
+        self.mixer.buffer(4)[:] = 1
+        self.mixer.mix(outdata.copy(), outdata)
+        assert_allclose(outdata, zeros((4, 8)), err_msg="muted at once")
@@ -1,5 +1,6 @@
 import unittest
-from instruments.blocks import Block, Nav, CCBlock, Stack
+from instruments.blocks import Block, Nav, CCBlock, Pager, Stack
+from instruments.messages import StepMessage
 from midi.messages import MidiCC, MidiNote
 
 
@@ -19,19 +20,22 @@ class TestNavInstr(unittest.TestCase):
         self.assertEqual(
             self.block.range, range(87, 91), "block macro ranges from 87 to 91"
         )
-        self.assertEqual(
-            len(self.block.children), 4, "block has 4 versions of its children"
-        )
+        self.assertEqual(len(self.block.children), 1, "block has 1 child")
 
     def test_child(self):
-        """Nav children are correctly created"""
-        for i, row in enumerate(self.block.children):
-            with self.subTest("child", i=i):
-                self.assertEqual(len(row), 1, "block has 1 child")
-                self.assertIsInstance(row[0], CCBlock, "child is a CC block")
-                self.assertEqual(row[0].parent, self.block, "child has parent")
-                self.assertEqual(row[0].macro, 176, "child macro is 176")
-                self.assertEqual(row[0].address, [0, 0], "address is 0,0")
+        """Nav children are shared by all pages, their grid has a page axis"""
+        child = self.block.children[0]
+        self.assertIsInstance(child, CCBlock, "child is a CC block")
+        self.assertEqual(child.parent, self.block, "child has parent")
+        self.assertEqual(child.macro, 176, "child macro is 176")
+        self.assertEqual(child.address, [0, 0], "address is 0,0")
+        self.assertEqual(child.grid.shape, (4, 8, 1), "4 pages of 8x1")
+        for i in range(4):
+            with self.subTest("page", i=i):
+                page = self.block.get(i, 176)
+                assert page is not None, "block should exist"
+                self.assertEqual(page.page, (i,), "view on page %i" % i)
+                self.assertTrue(page.values.base is child.grid, "values are views")
 
     def test_get(self):
         """Get a nav block"""
@@ -76,3 +80,90 @@ class TestNavInstr(unittest.TestCase):
                     self.assertEqual(msg.value, 100, "msg value is 100")
                 else:
                     self.assertEqual(msg.value, 0, "msg value is 0")
+
+
+class TestNavRoutes(unittest.TestCase):
+    def setUp(self) -> None:
+        self.block = Nav(
+            "instr",
+            87,
+            4,
+            CCBlock("synth", 48, 8),
+            Nav("target", 82, 3, Stack("length", 52, (1, 16))),
+        )
+        return super().setUp()
+
+    def test_table(self):
+        """Every page and macro is routed to its block"""
+        self.assertIs(self.block.get(2, 88), self.block, "nav macro")
+        synth = self.block.get(2, 180)
+        assert synth is not None, "block should exist"
+        self.assertIs(self.block.get(180), self.block.children[0], "current page")
+        self.assertEqual((synth.name, synth.page), ("synth", (2,)), "synth page 2")
+        target = self.block.get(3, 83)
+        assert isinstance(target, Nav), "target nav should exist"
+        self.assertEqual(target.page, (3,), "target nav on page 3")
+        length = self.block.get(1, 52)
+        assert length is not None, "block should exist"
+        self.assertEqual(length.name, "length", "nested block")
+        self.assertEqual(length.page, (1, 0), "nested page 0 of page 1")
+        self.assertEqual(length.grid.shape, (4, 3, 1, 16), "one grid for all pages")
+        self.assertIsNone(self.block.get(0, 60), "no block")
+
+
+class TestNavPages(unittest.TestCase):
+    def setUp(self) -> None:
+        self.block = Nav(
+            "target",
+            82,
+            3,
+            Pager(97, Block("steps", 53, (5, 16)), Stack("length", 52, (1, 16))),
+            CCBlock("synth", 48, 8),
+        )
+        return super().setUp()
+
+    def test_pages(self):
+        """Children values are views of one array per child"""
+        synth = self.block.children[1]
+        self.assertEqual(synth.grid.shape, (3, 8, 1), "3 pages of 8x1")
+        list(self.block.set(2, 178, 64))
+        self.assertEqual(synth.grid[2, 2, 0], 64, "page 2 is a view")
+        self.assertEqual(synth.grid.sum(), 64, "other pages are untouched")
+
+    def test_pager_pages(self):
+        """Pager children are shared, each page has its own values"""
+        pager = self.block.children[0]
+        assert isinstance(pager, Pager), "child is a pager"
+        steps, length = pager.children
+        self.assertIs(self.block.get(55), steps, "one steps block")
+        self.assertEqual(steps.grid.shape, (3, 5, 16), "3 pages of 5x16")
+        page = self.block.get(1, 55)
+        assert page is not None, "block should exist"
+        page.update_value(2, 2, 127)
+        self.assertEqual(page.value_at(55, 2), 127, "page 1 is set")
+        self.assertEqual(steps.value_at(55, 2), 0, "page 0 is untouched")
+        self.assertIs(steps.root, self.block, "children belong to the nav")
+        self.assertIsInstance(length, Stack, "stacks stay stacks")
+
+    def test_navigation(self):
+        """Moving to another page displays its values"""
+        list(self.block.set(1, 178, 64))
+        self.block.current = 83, 0, 127
+        messages = list(self.block.message(83, 0))
+        self.assertEqual(self.block.row_idx, 1, "block page is 1")
+        values = [msg.value for msg in messages if isinstance(msg, MidiCC)]
+        self.assertEqual(values, [0, 0, 64, 0, 0, 0, 0, 0], "page 1 values")
+
+    def test_set_grid(self):
+        """A whole step grid is set at once, displayed on the current page"""
+        grid = StepMessage(0, 53, 83, *[[127, 0, 0, 0, 0]] * 16).grid
+        self.assertEqual(grid.shape, (5, 16), "5 pads of 16 steps")
+        self.assertEqual(len(self.block.set_grid(1, 53, grid)), 0, "not current")
+        steps = self.block.get(1, 53)
+        assert steps is not None, "block should exist"
+        self.assertEqual(steps.values[0].sum(), 127 * 16, "first pad is set")
+        self.assertEqual(steps.values[1:].sum(), 0, "other pads are off")
+        messages = list(self.block.set_grid(0, 53, grid))
+        self.assertEqual(len(messages), 40, "page 0 is displayed")
+        self.assertIsNone(self.block.get(0, 60), "no block")
+        self.assertEqual(self.block.set_grid(0, 60, grid), [], "nothing to set")
@@ -0,0 +1,96 @@
+import time
+import unittest
+from midi.messages import MidiCC, MidiNote, SysexCmd, SysexReq
+from midi.output import MidiOutput
+
+
+class Port(list):
+    name = "test"
+    closed = False
+
+    def send(self, msg):
+        self.append(msg)
+
+
+class TestMidiOutput(unittest.TestCase):
+    def setUp(self) -> None:
+        self.port = Port()
+        self.output = MidiOutput(self.port, rate=100000)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.output.close()
+        return super().tearDown()
+
+    def wait(self, count: int):
+        for _ in range(100):
+            if len(self.port) >= count:
+                return
+            time.sleep(0.01)
+
+    def test_priority(self):
+        """Sysex go first, then CC, then notes"""
+        self.output.put(MidiNote(0, 53), delay=0.05)
+        self.output.put(MidiCC(0, 48, 64), delay=0.05)
+        self.output.put(SysexCmd("patch", [22, 5, 32]), delay=0.05)
+        self.wait(3)
+        types = [msg.type for msg in self.port]
+        self.assertEqual(types, ["sysex", "control_change", "note_on"], "by priority")
+
+    def test_coalesce(self):
+        """Pending CC and sysex to the same address are replaced, notes are kept"""
+        self.output.put(MidiCC(0, 48, 64), delay=0.05)
+        self.output.put(MidiCC(0, 48, 100), delay=0.05)
+        self.output.put(MidiCC(1, 48, 100), delay=0.05)
+        self.output.put(MidiNote(0, 53), delay=0.05)
+        self.output.put(MidiNote(0, 53, 0), delay=0.05)
+        self.assertEqual(len(self.output), 4, "4 messages are pending")
+        self.wait(4)
+        values = [msg.value for msg in self.port[0:2]]
+        self.assertEqual(values, [100, 100], "last CC values win")
+        notes = [msg.velocity for msg in self.port[2:4]]
+        self.assertEqual(notes, [127, 0], "notes are kept in order")
+
+    def test_request_and_write(self):
+        """A request and a write to the same address don't replace each other"""
+        self.output.put(SysexCmd("common", [0, 0, 0, 1, 2, 3]), delay=0.05)
+        self.output.put(SysexReq("common", [0, 0, 0, 0, 0, 4]), delay=0.05)
+        self.assertEqual(len(self.output), 2, "both are pending")
+        self.output.put(SysexCmd("common", [0, 0, 0, 1, 2, 4]), delay=0.05)
+        self.assertEqual(len(self.output), 2, "the write is replaced")
+
+    def test_rate(self):
+        """Messages are paced to the output budget"""
+        self.output.rate = 300  # a 3 bytes CC every 10ms
+        start = time.monotonic()
+        for i in range(5):
+            self.output.put(MidiCC(0, i, 64))
+        self.wait(5)
+        self.assertGreaterEqual(time.monotonic() - start, 0.04, "paced at 10ms")
+
+    def test_close(self):
+        """Closing wakes the thread up, later messages are dropped"""
+        self.output.put(MidiNote(0, 53), delay=10)
+        self.output.close()
+        self.output.join(1)
+        self.assertFalse(self.output.is_alive(), "thread exited")
+        self.output.put(MidiNote(0, 54))
+        self.assertEqual(len(self.port), 0, "nothing sent")
+
+    def test_no_wait(self):
+        """A full heap drops the messages of a caller that can't wait"""
+        self.output.size = 1
+        self.output.put(MidiNote(0, 53), delay=10)
+        self.output.put(MidiNote(0, 54), delay=10, wait=False)
+        self.assertEqual((len(self.output), self.output.dropped), (1, 1), "dropped")
+
+    def test_port_closed(self):
+        """Once the port closed, a full heap does not block"""
+        self.port.closed = True
+        self.output.put(MidiNote(0, 53))  # sent, then the thread sees the port
+        self.output.join(1)
+        self.assertTrue(self.output.closed, "closed with the port")
+        self.output.size = 1
+        self.output.put(MidiNote(0, 54))
+        self.output.put(MidiNote(0, 55))
+        self.assertEqual(len(self.output), 0, "dropped, not waiting")
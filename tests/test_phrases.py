@@ -0,0 +1,126 @@
+import os
+import tempfile
+import unittest
+from numpy import memmap
+from audio import Phrases
+
+
+class TestPhrases(unittest.TestCase):
+    def setUp(self) -> None:
+        self.phrases = Phrases(4, 2, 8, chunk=4)
+        return super().setUp()
+
+    def test_lazy(self):
+        """Phrases are only allocated when armed"""
+        self.assertEqual(len(self.phrases), 4, "there are 4 phrases")
+        self.assertIsNone(self.phrases[0], "phrase 0 is not allocated")
+        data = self.phrases.arm(1)
+        self.assertEqual(data.shape, (8, 2), "phrase 1 is 8 frames of 2 channels")
+        self.assertEqual(self.phrases.allocated, [1], "only phrase 1 is allocated")
+        self.assertIs(self.phrases.arm(1), data, "phrase 1 is not reallocated")
+        self.assertEqual(self.phrases.capacity(1), 12, "one more chunk reserved")
+
+    def test_resize(self):
+        """Resizing swaps in new views, keeping the recorded audio"""
+        data = self.phrases.arm(2)
+        data[:] = 1
+        self.phrases.resize(11)
+        self.assertEqual(self.phrases.size, 12, "whole chunks")
+        resized = self.phrases[2]
+        assert resized is not None, "phrase 2 is still allocated"
+        self.assertIsNot(resized, data, "phrase 2 is a new view")
+        self.assertIs(resized.base, data.base, "of the same buffer")
+        self.assertEqual(len(data), 8, "old buffer is untouched")
+        self.assertEqual(resized[:8].sum(), 16, "recorded audio is kept")
+        self.assertEqual(resized[8:].sum(), 0, "new audio is silent")
+        self.assertIsNone(self.phrases[0], "phrase 0 is still not allocated")
+
+    def test_chunks(self):
+        """Buffers only grow when armed, by whole chunks"""
+        phrases = Phrases(4, 2, 8, chunk=16)
+        buffer = phrases.arm(0).base
+        self.assertEqual(phrases.capacity(0), 32, "one chunk, and one more")
+        phrases.resize(40)
+        self.assertIs(phrases[0].base, buffer, "not grown until armed")  # type: ignore
+        self.assertEqual(len(phrases[0]), 32, "shortened to the buffer")  # type: ignore
+        phrases.arm(0)
+        self.assertEqual(phrases.capacity(0), 48, "three chunks")
+        phrases.resize(4)
+        self.assertEqual(phrases.capacity(0), 48, "buffers don't shrink")
+
+    def test_threshold(self):
+        """The length is kept unless it changes by more than a chunk"""
+        phrases = Phrases(4, 2, 32, chunk=16)
+        data = phrases.arm(0)
+        phrases.resize(20)
+        self.assertIs(phrases[0], data, "shorter by a chunk, kept")
+        phrases.resize(33)
+        self.assertEqual(phrases.size, 48, "longer, grown by a chunk")
+        phrases.resize(10)
+        self.assertEqual(phrases.size, 16, "shorter by more than a chunk")
+
+    def test_memmap_grow(self):
+        """Phrase files grow in place, keeping their audio"""
+        with tempfile.TemporaryDirectory() as directory:
+            phrases = Phrases(4, 2, 8, directory, chunk=16)
+            phrases.arm(0)[:] = 1
+            files = os.listdir(directory)
+            phrases.resize(40)
+            data = phrases.arm(0)
+            self.assertEqual(os.listdir(directory), files, "same file")
+            self.assertEqual(phrases.capacity(0), 48, "3 chunks")
+            self.assertEqual(data[:8].sum(), 16, "recorded audio is kept")
+            self.assertEqual(data[8:].sum(), 0, "new audio is silent")
+            phrases.close()
+
+    def test_memmap(self):
+        """Phrases can be backed by files"""
+        with tempfile.TemporaryDirectory() as directory:
+            phrases = Phrases(4, 2, 8, directory)
+            self.assertIsInstance(phrases.arm(0), memmap, "phrase 0 is memmapped")
+            self.assertEqual(len(os.listdir(directory)), 1, "one file per phrase")
+            phrases.resize(16)
+            self.assertEqual(len(os.listdir(directory)), 1, "old file is removed")
+            phrases.close()
+            self.assertEqual(os.listdir(directory), [], "files are removed")
+
+    def test_snapshot(self):
+        """A snapshot keeps the audio of the phrases being recorded"""
+        self.phrases.arm(1)[:] = 0.5
+        self.phrases.arm(3)[:] = 1
+        snapshot = self.phrases.snapshot([3])
+        self.assertEqual(list(snapshot), [1, 3], "recorded phrases")
+        self.phrases[1][:] = self.phrases[3][:] = 0  # type: ignore
+        self.assertEqual(snapshot[1].sum(), 0, "phrase 1 is a view")
+        self.assertEqual(snapshot[3].sum(), 16, "phrase 3 is copied")
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "set.octo")
+            self.phrases.save(path, snapshot)
+            phrases = Phrases(4, 2)
+            phrases.load(path)
+            self.assertEqual(phrases[3].sum(), 16, "snapshot is saved")  # type: ignore
+
+    def test_save_load(self):
+        """Phrases and state are saved to a file, then mapped back"""
+        self.phrases.arm(1)[:] = 0.5
+        self.phrases.arm(3)[4:] = 1
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "set.octo")
+            self.phrases.save(path, bars=4, volumes=[1.0] * 8)
+            phrases = Phrases(4, 2)
+            state = phrases.load(path)
+            self.assertEqual(state, dict(bars=4, volumes=[1.0] * 8), "state is loaded")
+            self.assertEqual(phrases.size, 8, "size is loaded")
+            self.assertEqual(phrases.allocated, [1, 3], "phrases 1 & 3 are loaded")
+            data = phrases[3]
+            assert data is not None, "phrase 3 is loaded"
+            self.assertIsInstance(data, memmap, "phrase 3 is mapped")
+            self.assertEqual(data[4:].sum(), 8, "phrase 3 data is loaded")
+            phrases.resize(64)
+            self.assertIsInstance(phrases[3], memmap, "not copied by a resize")
+            data[:] = 0
+            reloaded = Phrases(4, 2)
+            reloaded.load(path)
+            data = reloaded[3]
+            assert data is not None, "phrase 3 is loaded again"
+            self.assertEqual(data[4:].sum(), 8, "file is untouched (copy on write)")
@@ -0,0 +1,111 @@
+import unittest
+import threading
+from queue import SimpleQueue
+import mido
+from midi.device import MidiDevice
+from midi.reader import MidiReader
+
+
+class Port(list):
+    name = "test"
+    closed = False
+
+    def __init__(self, *args):
+        super().__init__(args)
+        self.ready = threading.Event()
+
+    def close(self):
+        self.closed = True
+
+    def __iter__(self):
+        self.ready.wait(1)  # lets every queue subscribe first
+        return super().__iter__()
+
+
+class TestMidiReader(unittest.TestCase):
+    def test_shared(self):
+        """A port has one reader"""
+        port = Port()
+        self.assertIs(MidiReader.of(port), MidiReader.of(port), "reader is shared")
+
+    def test_subscribe(self):
+        """Messages are dispatched to the queues selecting them"""
+        port = Port(mido.Message("clock"), mido.Message("note_on", note=50))
+        reader = MidiReader.of(port)
+        clock = reader.subscribe(lambda msg: msg.type == "clock")
+        notes = reader.subscribe(lambda msg: msg.type != "clock")
+        port.ready.set()
+        self.assertEqual(clock.get(timeout=1).type, "clock", "clock is queued")
+        self.assertIsNone(clock.get(timeout=1), "port is closed")
+        self.assertEqual(notes.get(timeout=1).note, 50, "note is queued")
+        self.assertIsNone(notes.get(timeout=1), "port is closed")
+
+    def test_iterate(self):
+        """Selected messages are iterated until the port closes"""
+        clock = mido.Message("clock")
+        port = Port(clock, mido.Message("note_on"), clock)
+        clocks = MidiReader.of(port).iterate(lambda msg: msg.type == "clock")
+        port.ready.set()
+        self.assertEqual(len(list(clocks)), 2, "2 clock messages")
+
+    def test_tap(self):
+        """Tapped messages are called back before being queued"""
+        port = Port(mido.Message("clock"), mido.Message("note_on"))
+        reader = MidiReader.of(port)
+        tapped = []
+        reader.tap(lambda msg: msg.type == "clock", tapped.append)
+        notes = reader.subscribe(lambda msg: msg.type == "note_on")
+        port.ready.set()
+        self.assertEqual(notes.get(timeout=1).type, "note_on", "note is queued")
+        self.assertEqual([msg.type for msg in tapped], ["clock"], "clock is tapped")
+
+    def test_iterate_tap(self):
+        """A tap and its queue see the same messages, a failing tap loses one"""
+        port = Port(*[mido.Message("note_on", note=n) for n in range(50, 53)])
+        tapped = []
+
+        def tap(msg):
+            if msg.note == 51:
+                raise ValueError("tap failed")
+            tapped.append(msg.note)
+
+        notes = MidiReader.of(port).iterate(lambda msg: True, tap)
+        with self.assertLogs(level="ERROR"):
+            port.ready.set()
+            self.assertEqual([m.note for m in notes], [50, 51, 52], "all queued")
+        self.assertEqual(tapped, [50, 52], "the reader goes on")
+
+
+class TestPending(unittest.TestCase):
+    def test_closed(self):
+        """The end of a port is seen behind pending messages"""
+        device = MidiDevice.__new__(MidiDevice)
+        device.inport = device.outport = None  # type: ignore
+        queue = SimpleQueue()
+        queue.put(mido.Message("note_on", note=50))
+        queue.put(None)
+        self.assertIsNone(device.pending(queue), "port is closed")
+
+    def test_poll(self):
+        """Polled messages come from the port reader, shared with the clock"""
+
+        class Server(list):
+            send = list.append
+
+            def pending(self):
+                return []
+
+        class Device(MidiDevice):
+            select_message = property(lambda _: lambda msg: True)
+
+        clock = mido.Message("clock")
+        port = Port(clock, mido.Message("note_on", note=50), clock)
+        device = Device.__new__(Device)
+        device.inport, device.server = port, Server()  # type: ignore
+        device.outport = None  # type: ignore
+        self.assertEqual(device.messages, [], "nothing read yet")
+        clocks = MidiReader.of(port).iterate(lambda msg: msg.type == "clock")
+        port.ready.set()
+        self.assertEqual(len(list(clocks)), 2, "the clock is not lost")
+        self.assertEqual([m.note for m in device.messages], [50], "note is polled")
+        self.assertEqual(len(device.server), 1, "note is forwarded")
@@ -0,0 +1,59 @@
+import os
+import wave
+import tempfile
+import unittest
+from numpy import arange, full, zeros, float32
+from numpy.testing import assert_array_equal
+from audio import RingBuffer, TakeWriter
+from audio.writer import channel_name
+
+
+class TestRingBuffer(unittest.TestCase):
+    def setUp(self) -> None:
+        self.ring = RingBuffer(8, 2)
+        return super().setUp()
+
+    def test_push_pull(self):
+        """Frames come out in the order they went in, wrapping around"""
+        out = zeros((8, 2), dtype=float32)
+        block = arange(12, dtype=float32).reshape((6, 2))
+        self.assertTrue(self.ring.push(block), "block fits")
+        self.assertEqual(self.ring.pull(out[:4]), 4, "pulled 4 frames")
+        self.assertTrue(self.ring.push(block), "block fits after pulling")
+        self.assertEqual(self.ring.fill, 8, "ring is full")
+        self.assertEqual(self.ring.pull(out), 8, "pulled 8 frames")
+        assert_array_equal(out[:2], block[4:], "end of 1st block")
+        assert_array_equal(out[2:], block, "2nd block wrapped around")
+
+    def test_overrun(self):
+        """Blocks that don't fit are dropped and counted"""
+        block = full((6, 2), 1, dtype=float32)
+        self.ring.push(block)
+        self.assertFalse(self.ring.push(block), "block does not fit")
+        self.assertEqual(self.ring.overruns, 1, "1 overrun")
+        self.assertEqual(self.ring.dropped, 6, "6 frames dropped")
+        self.assertEqual(self.ring.peak, 6, "peak fill is 6")
+
+
+class TestTakeWriter(unittest.TestCase):
+    def test_channel_name(self):
+        """Mono files are named after the strings, then the main out"""
+        names = [channel_name(ch) for ch in range(9)]
+        self.assertEqual(names[:2], ["string1", "string2"], "strings 1 & 2")
+        self.assertEqual(names[6:], ["out-L", "out-R", "ch9"], "OUT-L/OUT-R")
+
+    def test_take(self):
+        """Pushed frames are written to a multichannel and mono files"""
+        ring = RingBuffer(64, 2)
+        with tempfile.TemporaryDirectory() as directory:
+            writer = TakeWriter(ring, directory, 48000, split=True)
+            writer.start()
+            ring.push(full((32, 2), 0.5, dtype=float32))
+            writer.cut()
+            writer.stop()
+            files = sorted(os.listdir(directory))
+            self.assertEqual(len(files), 3, "1 stereo + 2 mono files")
+            self.assertTrue(files[0].endswith("-string1.wav"), "string 1 file")
+            with wave.open(os.path.join(directory, files[-1])) as take:
+                self.assertEqual(take.getnchannels(), 2, "take has 2 channels")
+                self.assertEqual(take.getnframes(), 32, "take has 32 frames")
@@ -1,4 +1,5 @@
 import unittest
+from numpy import array
 from instruments.messages import InternalMessage, MacroMessage, StepMessage
 from instruments.sequencer import Bar, Grid, Sequencer
 
@@ -17,6 +18,13 @@ class TestGridPad(unittest.TestCase):
         self.assertEqual(self.pad.to_vel(38), [0, 0, 127, 127, 127], "value is 64")
         self.assertEqual(self.pad.to_vel(44), [127] * 5, "value is 127")
 
+    def test_to_grid(self):
+        steps = array([0, 8, 30, 32, 33, 38, 40, 44, 56, 60, *range(50, 56)])
+        expected = [self.pad.to_vel(val) for val in steps]
+        grid = self.pad.to_grid(steps)
+        self.assertEqual(grid.shape, (5, 16), "one row per pad")
+        self.assertListEqual(grid.T.tolist(), expected, "same as to_vel")
+
 
 class TestBarPad(unittest.TestCase):
     def setUp(self) -> None:
@@ -69,6 +77,8 @@ class TestSequencerPad(unittest.TestCase):
             self.assertEqual(msg.idx, 0, "idx is 0")
             if isinstance(msg, StepMessage):  # pitch
                 self.assertEqual(msg.macro, 53, "macro is 53")
+                self.assertIs(msg.grid, msg._grid, "grid is passed as is")
+                self.assertEqual(msg.grid.shape, (5, 16), "one row per pad")
                 self.assertIn(msg.value, range(82, 85), "value is 82")
                 if msg.value == 82:
                     self.assertEqual(
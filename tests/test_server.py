@@ -0,0 +1,170 @@
+import time
+import socket
+import unittest
+import mido
+from midi.clock import TEMPO_REQUEST, tempo_message
+from midi.server import MidiServer, NetBridge
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def recv(sock: socket.socket, size: int):
+    data = b""
+    while len(data) < size:
+        data += sock.recv(size - len(data))
+    return data
+
+
+class TestNetBridge(unittest.TestCase):
+    def bridge(self, *args, **kwargs):
+        bridge = NetBridge(*args, **kwargs)
+        self.addCleanup(bridge.close)
+        return bridge
+
+    def client(self, bridge: NetBridge):
+        sock = socket.create_connection(("localhost", bridge.portno))
+        self.addCleanup(sock.close)
+        self.assertTrue(wait_for(lambda: len(bridge.clients) > 0), "connected")
+        return sock
+
+    def test_messages(self):
+        """Messages go to every client in order, theirs are queued"""
+        bridge = self.bridge(0)
+        clients = [self.client(bridge), self.client(bridge)]
+        self.assertTrue(wait_for(lambda: len(bridge.clients) == 2), "2 clients")
+        notes = [mido.Message("note_on", note=n) for n in range(60, 70)]
+        for msg in notes:
+            bridge.send(msg)
+        expected = b"".join(bytes(msg.bytes()) for msg in notes)
+        for sock in clients:
+            self.assertEqual(recv(sock, len(expected)), expected, "sent in order")
+        clients[0].sendall(bytes(mido.Message("control_change", value=3).bytes()))
+        received = []
+        wait_for(lambda: received.extend(bridge.iter_pending()) or len(received))
+        self.assertEqual([m.value for m in received], [3], "client message")
+
+    def test_backpressure(self):
+        """A client that doesn't read loses messages, then is dropped"""
+        bridge = self.bridge(0, limit=64, stall=0.2)
+        slow = self.client(bridge)
+        slow.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1024)
+        sysex = mido.Message("sysex", data=[0] * 1000)
+        for _ in range(2000):
+            bridge.send(sysex)
+            if any(c.dropped for c in bridge.clients.values()):
+                break
+        self.assertTrue(
+            any(c.dropped for c in bridge.clients.values()), "messages dropped"
+        )
+        self.assertTrue(wait_for(lambda: len(bridge.clients) == 0), "dropped")
+
+    def test_backed_up_client(self):
+        """A client that doesn't read isn't dropped when the others are served"""
+        bridge = self.bridge(0, limit=1 << 25, stall=30.0)
+        slow = self.client(bridge)
+        slow.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1024)
+        fast = self.client(bridge)
+        fast.settimeout(2.0)
+        self.assertTrue(wait_for(lambda: len(bridge.clients) == 2), "2 clients")
+        for client in bridge.clients.values():  # the bridge side of the sockets
+            client.sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+        sysex = mido.Message("sysex", data=[0] * 1000)
+        backed_up = lambda: any(len(c.out) > 1 << 14 for c in bridge.clients.values())
+        for _ in range(2000):
+            bridge.send(sysex)
+            recv(fast, 1002)
+            if backed_up():
+                break
+        self.assertTrue(backed_up(), "slow client backed up")
+        bridge.send(mido.Message("note_on", note=64))  # wakes the bridge up
+        self.assertEqual(recv(fast, 3), b"\x90\x40\x40", "fast client served")
+        self.assertEqual(len(bridge.clients), 2, "slow client kept")
+
+    def test_reconnect(self):
+        """A peer is connected when it shows up, and again after a drop"""
+        probe = socket.create_server(("localhost", 0))
+        port = probe.getsockname()[1]
+        probe.close()
+        NetBridge.retry = 0.05
+        self.addCleanup(setattr, NetBridge, "retry", 2.0)
+        backup = self.bridge(None, ["localhost:%i" % port])
+        time.sleep(0.1)  # refused, retrying
+        main = self.bridge(port)
+        self.assertTrue(wait_for(lambda: len(main.clients) == 1), "connected")
+        connected = lambda: any(c.connected for c in backup.clients.values())
+        self.assertTrue(wait_for(connected), "peer connected")
+        for client in list(main.clients.values()):
+            client.sock.shutdown(socket.SHUT_RDWR)
+        self.assertTrue(wait_for(lambda: not connected()), "peer dropped")
+        self.assertTrue(wait_for(connected), "peer reconnected")
+        backup.send(mido.Message("note_on", note=64))
+        received = []
+        wait_for(lambda: received.extend(main.iter_pending()) or len(received))
+        self.assertEqual([m.note for m in received], [64], "peer message")
+
+    def test_tempo_clients(self):
+        """Clients asking for the tempo get it instead of the ticks"""
+        bridge = self.bridge(0)
+        ticks, tempo = self.client(bridge), self.client(bridge)
+        self.assertTrue(wait_for(lambda: len(bridge.clients) == 2), "2 clients")
+        tempo.sendall(bytes(TEMPO_REQUEST.bytes()))
+        asking = lambda: any(c.tempo for c in bridge.clients.values())
+        self.assertTrue(wait_for(asking), "tempo requested")
+        clock = mido.Message("clock")
+        bridge.send_clock(clock, tempo_message(120, 0))
+        bridge.send_clock(clock, None)
+        self.assertEqual(recv(ticks, 2), b"\xf8\xf8", "ticks")
+        expected = bytes(tempo_message(120, 0).bytes())
+        self.assertEqual(recv(tempo, len(expected)), expected, "tempo only")
+        self.assertEqual(list(bridge.iter_pending()), [], "request isn't queued")
+
+
+class TestMidiServer(unittest.TestCase):
+    def server(self):
+        server = MidiServer(0)
+        self.addCleanup(server.close)
+        return server
+
+    def client(self, server: MidiServer):
+        portno = server._socket.getsockname()[1]
+        sock = socket.create_connection(("localhost", portno))
+        self.addCleanup(sock.close)
+        count = len(server.clients)
+        accepted = lambda: server.pending() == [] and len(server.clients) > count
+        self.assertTrue(wait_for(accepted), "connected")
+        return sock
+
+    def test_slow_client(self):
+        """A client that doesn't read doesn't block the clock, nor the others"""
+        server = self.server()
+        slow, fast = self.client(server), self.client(server)
+        slow.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1024)
+        sysex = mido.Message("sysex", data=[0] * 1000)
+        start = time.monotonic()
+        for _ in range(20000):
+            server.send_clock(sysex, None)
+            if any(c.dropped for c in server.clients):
+                break
+        self.assertLess(time.monotonic() - start, 2, "sends don't block")
+        self.assertTrue(any(c.dropped for c in server.clients), "messages dropped")
+        self.assertEqual(len(recv(fast, 1000 * 1002)), 1000 * 1002, "fast client")
+
+    def test_closed_client(self):
+        """A client gone is dropped, the others still get the messages"""
+        server = self.server()
+        gone, other = self.client(server), self.client(server)
+        gone.close()
+        note = mido.Message("note_on", note=60)
+        for _ in range(3):
+            server.send(note)
+            server.send_clock(mido.Message("clock"), None)
+        dropped = lambda: server.pending() == [] and len(server.clients) == 1
+        self.assertTrue(wait_for(dropped), "dropped")
+        self.assertEqual(recv(other, 9)[0:3], bytes(note.bytes()), "still sent")
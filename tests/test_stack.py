@@ -25,10 +25,10 @@ class TestStack(unittest.TestCase):
     def test_update_value(self):
         """Update value with a single arg"""
         self.block.update_value(0)
-        self.assertListEqual(self.block.values[0], [127, *[0] * 15], "value is [127] + 15 * [0]")
+        self.assertListEqual(self.block.values[0].tolist(), [127, *[0] * 15], "value is [127] + 15 * [0]")
         self.assertEqual(self.block.value_at(0), 1, "value is 1")
         self.block.update_value(15)
-        self.assertListEqual(self.block.values[0], [127] * 16, "value is [127] * 16")
+        self.assertListEqual(self.block.values[0].tolist(), [127] * 16, "value is [127] * 16")
 
     def test_pagination(self):
         """Change value scrolling through pages"""
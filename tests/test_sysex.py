@@ -0,0 +1,39 @@
+import random
+import unittest
+from midi.messages import SysexCmd, SysexReq
+from midi.sysex import SYSEX_CMD, SYSEX_REQ, SYNTH_SYSEX_CMD
+from utils import checksum, MaxByteException
+
+
+class TestSysexEncoder(unittest.TestCase):
+    def test_encode(self):
+        """Same bytes as the checksum utility"""
+        encoder = SYSEX_CMD["patch"]
+        for data in [[22, 16, 0, 0, 0, 1], [22, 158, 0], [22, 160, 108], []]:
+            with self.subTest(data=data):
+                expected = [*SYNTH_SYSEX_CMD, *checksum([16, 0], list(data))]
+                self.assertEqual(list(encoder.encode(data)), expected, "same bytes")
+
+    def test_random(self):
+        """Same bytes as the checksum utility, for random patch data"""
+        rand = random.Random(1000)
+        encoder = SYSEX_REQ["patch"]
+        for _ in range(200):
+            data = [rand.randrange(0, 300) for _ in range(rand.randrange(1, 12))]
+            data[0] = rand.randrange(0, 100)
+            expected = list(encoder.prefix[:7]) + checksum([16, 0], list(data))
+            self.assertEqual(list(encoder.encode(data)), expected, "same bytes")
+
+    def test_head_carry(self):
+        """Carries run into the address head"""
+        encoded = SYSEX_CMD["inout"].encode([200, 1])
+        self.assertEqual(list(encoded[7:11]), [0, 5, 72, 1], "head is 0, 5")
+        with self.assertRaises(MaxByteException):
+            SYSEX_CMD["patch"].encode([127 * 128 * 128, 0])
+
+    def test_messages(self):
+        """Messages are built with the encoders"""
+        req = SysexReq("patch", [22, 5, 0, 0, 0, 1])
+        self.assertEqual(req.address, (16, 0, 22, 5), "address is correct")
+        cmd = SysexCmd("common", [0, 0, 1, 2])
+        self.assertEqual(cmd.data[6], 18, "command byte is 18")
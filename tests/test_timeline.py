@@ -0,0 +1,55 @@
+import random
+import unittest
+from audio.timeline import ClockTimeline, SampleClock
+
+
+class TestClockTimeline(unittest.TestCase):
+    def setUp(self) -> None:
+        self.timeline = ClockTimeline(window=96)
+        self.period = 60 / (120 * 24)  # 120 BPM
+        return super().setUp()
+
+    def test_tempo(self):
+        """Tempo is estimated from jittery ticks"""
+        random.seed(1)
+        for n in range(200):
+            self.timeline.tick(100 + n * self.period + random.uniform(0, 0.002))
+        self.assertAlmostEqual(self.timeline.bpm, 120, delta=0.5, msg="120 BPM")
+        fitted = self.timeline.time_of(199)
+        self.assertAlmostEqual(fitted, 100 + 199 * self.period + 0.001, delta=0.001)
+
+    def test_gap(self):
+        """The fit restarts when the clock stops"""
+        for n in range(10):
+            self.timeline.tick(n * self.period)
+        self.timeline.tick(10.0)
+        self.assertEqual(len(self.timeline), 1, "old ticks are dropped")
+        self.assertEqual(self.timeline.bpm, 0, "no tempo yet")
+        self.assertEqual(self.timeline.time_of(), 10.0, "time of the last tick")
+
+    def test_first_start(self):
+        """A start without ticks has no time"""
+        self.assertIsNone(self.timeline.time_at(0, 5.0), "no ticks")
+        self.timeline.tick(5.0)
+        self.assertIsNone(self.timeline.time_at(1, 5.01), "no tempo yet")
+        self.timeline.tick(5.0 + self.period)
+        self.assertAlmostEqual(self.timeline.time_at(2, 5.03), 5 + 2 * self.period)
+
+    def test_restart(self):
+        """A start long after the clock stopped has no time"""
+        for n in range(48):
+            self.timeline.tick(n * self.period)
+        self.assertIsNotNone(self.timeline.time_at(48, 1.0), "clock runs")
+        self.assertIsNone(self.timeline.time_at(48, 60.0), "clock stopped")
+
+
+class TestSampleClock(unittest.TestCase):
+    def test_sample_at(self):
+        """Late callbacks don't move the sample position"""
+        clock = SampleClock(48000)
+        self.assertEqual(clock.sample_at(5.0), 0, "no block yet")
+        for i in range(10):
+            late = 0.003 if i % 3 else 0.0
+            start = clock.block(2.0 + i * 1024 / 48000 + late, 1024)
+            self.assertEqual(start, i * 1024, "first sample of the block")
+        self.assertEqual(clock.sample_at(2.5), 24000, "half a second in")
@@ -0,0 +1,51 @@
+import unittest
+import threading
+from midi.scheduler import MidiScheduler
+from midi.topology import Topology
+
+
+class TestTopology(unittest.TestCase):
+    def setUp(self) -> None:
+        self.topology = Topology(workers=1)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.topology.dispose()
+        return super().tearDown()
+
+    def run_on(self, scheduler):
+        done = threading.Event()
+        names = []
+
+        def action(*_):
+            names.append(threading.current_thread().name)
+            done.set()
+
+        scheduler.schedule(action)
+        self.assertTrue(done.wait(1), "action ran")
+        return names[0]
+
+    def test_io(self):
+        """Each device has its own event loop"""
+        synth = self.topology.io("[MID] SY-1000")
+        self.assertIsInstance(synth, MidiScheduler, "io loop is a midi scheduler")
+        self.assertIs(self.topology.io("[MID] SY-1000"), synth, "loop is shared")
+        self.assertIsNot(self.topology.io("[MID] APC40"), synth, "one loop per device")
+        self.assertEqual(self.run_on(synth), "[MID] SY-1000 I/O", "named thread")
+
+    def test_busy_device(self):
+        """A busy device delays neither the clock nor the other devices"""
+        release = threading.Event()
+        self.topology.io("[MID] SY-1000").schedule(lambda *_: release.wait(2))
+        try:
+            self.assertEqual(self.run_on(self.topology.clock), "[TEM] Clock")
+            on_clock = []
+            clock = self.topology.clock
+            clock.schedule(lambda *_: on_clock.append(self.topology.on_clock))
+            self.run_on(self.topology.clock)
+            self.assertEqual(on_clock, [True], "on the clock thread")
+            self.assertFalse(self.topology.on_clock, "not on the others")
+            self.run_on(self.topology.io("[MID] APC40"))
+            self.run_on(self.topology.pool)
+        finally:
+            release.set()
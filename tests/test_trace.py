@@ -0,0 +1,94 @@
+import os
+import time
+import tempfile
+import unittest
+import mido
+from instruments.messages import InternalMessage, StepMessage
+from midi.device import MidiDevice
+from midi.trace import TraceReplay, TraceWriter, read_trace
+
+
+class TestTrace(unittest.TestCase):
+    def setUp(self) -> None:
+        handle, self.file = tempfile.mkstemp(suffix=".trace")
+        os.close(handle)
+        self.addCleanup(os.remove, self.file)
+        return super().setUp()
+
+    def write(self, *records):
+        trace = TraceWriter(self.file)
+        for record in records:
+            trace.record(*record)
+        trace.close()
+
+    def test_round_trip(self):
+        """Messages are read back with their direction and device"""
+        steps = [[127, 0], [0, 127]]
+        self.write(
+            ("in", "[MID] SY-1000", mido.Message("program_change", program=5)),
+            ("out", "[MID] SY-1000", mido.Message("sysex", data=[65, 0, 105])),
+            ("in", "[MID] Akai APC40", InternalMessage("start", ["Play"], 2, 1.5)),
+            ("out", "[MID] Akai APC40", StepMessage(0, 53, 82, *steps)),
+        )
+        records = list(read_trace(self.file))
+        self.assertEqual([r.direction for r in records], ["in", "out", "in", "out"])
+        self.assertEqual(records[0].device, "[MID] SY-1000", "device is named")
+        self.assertEqual(records[0].msg.program, 5, "midi message")
+        self.assertEqual(list(records[1].msg.data), [65, 0, 105], "sysex message")
+        start = records[2].msg
+        self.assertEqual(start.data, (["Play"], 2, 1.5), "internal message")
+        step = records[3].msg
+        self.assertIsInstance(step, StepMessage, "message class is kept")
+        self.assertEqual(step.grid.tolist(), [[127, 0], [0, 127]], "steps")
+        times = [r.time for r in records]
+        self.assertEqual(times, sorted(times), "times are monotonic")
+
+    def test_not_a_message(self):
+        """None and other values sent to a device are not traced"""
+        note = mido.Message("note_on", note=60)
+        self.write(("out", "a", None), ("out", "a", object()), ("out", "a", note))
+        records = list(read_trace(self.file))
+        self.assertEqual([r.msg for r in records], [note], "only the note")
+
+    def test_device_send(self):
+        """A device sending None (an action without message) traces nothing"""
+        backend = mido.backend
+        mido.set_backend("benchmarks.loopback", load=True)
+        self.addCleanup(mido.set_backend, backend)
+        device = MidiDevice("Trace test MIDI 1")
+        device.trace = TraceWriter(self.file)
+        note = mido.Message("note_on", note=60)
+        with self.assertNoLogs(level="ERROR"):
+            device.send(None)
+            device.send(note)
+        device.trace.close()
+        self.assertEqual([r.msg for r in read_trace(self.file)], [note], "note")
+
+    def test_truncated(self):
+        """A trace cut by a crash is read up to its last whole record"""
+        note = mido.Message("note_on", note=60)
+        self.write(*[("in", "[MID] Akai APC40", note)] * 3)
+        with open(self.file, "r+b") as f:
+            f.truncate(os.path.getsize(self.file) - 1)
+        self.assertEqual(len(list(read_trace(self.file))), 2, "last one is cut")
+
+    def test_replay(self):
+        """Only the received MIDI messages are replayed, on time"""
+        trace = TraceWriter(self.file)
+        trace.record("in", "a", mido.Message("note_on", note=60))
+        trace.record("out", "a", mido.Message("note_on", note=61))
+        trace.record("in", "a", InternalMessage("beat"))
+        time.sleep(0.05)
+        trace.record("in", "b", mido.Message("note_on", note=62))
+        trace.close()
+        fed = []
+        feed = lambda device, msg: fed.append((time.monotonic(), device, msg.note))
+        lateness = TraceReplay(self.file).play(feed)
+        self.assertEqual([f[1:] for f in fed], [("a", 60), ("b", 62)], "inputs")
+        self.assertAlmostEqual(fed[1][0] - fed[0][0], 0.05, delta=0.01, msg="time")
+        self.assertLess(max(lateness), 0.01, "on time")
+        fed.clear()
+        start = time.monotonic()
+        TraceReplay(self.file, speed=0).play(feed)
+        self.assertLess(time.monotonic() - start, 0.02, "no wait")
+        self.assertEqual(len(fed), 2, "same inputs")
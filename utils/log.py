@@ -0,0 +1,62 @@
+"""Logging through a queue, and message logs that cost one flag check when off.
+
+    from utils import log
+    if log.enabled:
+        log.message(self.name, "OUT", msg)
+
+`setup` moves the formatting and the writes to a listener thread, so the MIDI
+and audio threads only put the records in a queue.
+"""
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+
+enabled = False  # debug records are kept, set by `setup`
+
+
+class DeferredQueueHandler(QueueHandler):
+    """Queues the records as they are, the listener formats them"""
+
+    def prepare(self, record: logging.LogRecord):
+        if record.exc_info:  # tracebacks can't wait, their frames go away
+            return super().prepare(record)
+        return record
+
+
+class Message:
+    """A copy of a device message (messages are mutable), formatted only when
+    the record is written"""
+
+    __slots__ = ("direction", "type", "data")
+
+    def __init__(self, direction: str, msg):
+        self.direction = direction
+        self.type = msg.type
+        self.data = msg.dict()
+
+    def __str__(self):
+        return "%s message %s: %s" % (self.type.capitalize(), self.direction, self.data)
+
+
+def message(device: str, direction: str, msg):
+    """Logs a message going IN, OUT or THRU a device, check `enabled` first"""
+    logging.debug("%s %s", device, Message(direction, msg))
+
+
+def setup(level=logging.INFO, format=None, datefmt=None):
+    """Sends the root logger records to a thread writing them on stderr"""
+    global enabled
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(format, datefmt))
+    queue: "SimpleQueue[logging.LogRecord]" = SimpleQueue()
+    listener = QueueListener(queue, handler)
+    root = logging.getLogger()
+    for previous in root.handlers[:]:
+        root.removeHandler(previous)
+    root.addHandler(DeferredQueueHandler(queue))
+    root.setLevel(level)
+    enabled = root.isEnabledFor(logging.DEBUG)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener